@@ -0,0 +1,279 @@
+import requests
+import asyncio
+import argparse
+import logging
+import json
+import time
+import os
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs, unquote
+import query_engine
+import arrow_store
+import data_version
+import manager_history
+
+# Constants
+HOST = "127.0.0.1"
+PORT = 8502  # Next to Streamlit's default 8501
+RELOAD_INTERVAL = 60  # Seconds between data-version manifest checks
+CACHE_SIZE = 2048  # Cached responses kept for the live data version
+MAX_LIMIT = 1000  # Largest leaderboard a request may ask for
+NICE_INCREMENT = 10  # Lower the server's CPU priority below the dashboard's
+READ_TIMEOUT = 10  # Seconds a client has to send its request
+
+
+class ApiError(Exception):
+    """
+    A client error, returned as a JSON body with its HTTP status.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def records(frame):
+    """
+    Convert a DataFrame to JSON-ready records (NaN becomes null).
+    """
+    return json.loads(frame.to_json(orient="records"))
+
+
+def int_param(params, name, default, maximum=None):
+    try:
+        value = int(params.get(name, [default])[0])
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+    if value < 1 or (maximum and value > maximum):
+        raise ApiError(400, f"{name} must be between 1 and {maximum}" if maximum else f"{name} must be at least 1")
+    return value
+
+
+def leaderboard(data, params):
+    """
+    Top managers by total or gameweek points, optionally for one favourite team.
+    """
+    order = params.get("by", ["total"])[0]
+    team = params.get("team", [None])[0]
+    limit = int_param(params, "limit", 20, MAX_LIMIT)
+    if order not in ("total", "event_total"):
+        raise ApiError(400, "by must be total or event_total")
+    if team and order != "total":
+        raise ApiError(400, "team leaderboards are ordered by total")
+    if team and team not in data["teams"] and team not in data["top_by_team"]:
+        raise ApiError(404, f"Unknown team: {team}")
+
+    # The snapshot's precomputed leaderboards cover the common sizes
+    if limit <= data_version.LEADERBOARD_SIZE:
+        if team:
+            # A season team nobody supports has no precomputed leaderboard
+            frame = data["top_by_team"].get(team, data["top_total"].head(0))
+        else:
+            frame = data["top_total"] if order == "total" else data["top_event"]
+        frame = frame.head(limit)
+    elif data.get("arrow_file"):
+        frame = arrow_store.top_n(data["arrow_file"], order, limit, team)
+    else:
+        frame = query_engine.top_n(data["db_file"], order, limit, team)
+    return {"by": order, "team": team, "players": records(frame)}
+
+
+def entry(data, entry_id):
+    """
+    The stored row for one FPL ID.
+    """
+    try:
+        entry_id = int(entry_id)
+    except ValueError:
+        raise ApiError(400, "FPL ID must be numeric")
+    if data.get("arrow_file"):
+        frame = arrow_store.lookup_entry(data["arrow_file"], entry_id)
+    else:
+        frame = query_engine.lookup_entry(data["db_file"], entry_id)
+    if frame.empty:
+        raise ApiError(404, f"No player found with FPL ID {entry_id}")
+    return {"entry": entry_id, **records(frame)[0]}
+
+
+def stats(data, params):
+    """
+    League-wide aggregates: headline metrics, team counts and point histograms.
+    """
+    return {
+        "overview": data["overview"],
+        "team_counts": records(data["team_counts"]),
+        "total_points_histogram": records(data["total_bins"]),
+        "overall_rank_histogram": records(data["rank_bins"]),
+    }
+
+
+def movers(data, params):
+    """
+    Biggest rank climbers or fallers, overall or for one favourite team.
+    """
+    direction = params.get("direction", ["climbers"])[0]
+    scope = params.get("scope", ["Overall"])[0]
+    limit = int_param(params, "limit", 20, query_engine.MOVERS_SIZE)
+    if direction not in ("climbers", "fallers"):
+        raise ApiError(400, "direction must be climbers or fallers")
+    frame = data["movers"]
+    frame = frame[(frame["direction"] == direction) & (frame["scope"] == scope)].head(limit)
+    return {"direction": direction, "scope": scope, "players": records(frame)}
+
+
+def route(data, path, params):
+    """
+    Dispatch a request path to its handler and return the response payload.
+    """
+    parts = [unquote(part) for part in path.strip("/").split("/") if part]
+    if parts == ["health"]:
+        return {"status": "ok"}
+    if parts == ["leaderboard"]:
+        return leaderboard(data, params)
+    if len(parts) == 3 and parts[0] == "teams" and parts[2] == "top":
+        return leaderboard(data, {**params, "team": [parts[1]], "by": ["total"]})
+    if len(parts) == 2 and parts[0] == "entry":
+        return entry(data, parts[1])
+    if parts == ["stats"]:
+        return stats(data, params)
+    if parts == ["movers"]:
+        return movers(data, params)
+    raise ApiError(404, f"Unknown endpoint: /{'/'.join(parts)}")
+
+
+def history_entry(path):
+    """
+    Return the FPL ID of an /entry/<id>/history path, or None for any other path.
+    """
+    parts = [part for part in path.strip("/").split("/") if part]
+    if len(parts) == 3 and parts[0] == "entry" and parts[2] == "history":
+        if not parts[1].isdigit():
+            raise ApiError(400, "FPL ID must be numeric")
+        return int(parts[1])
+    return None
+
+
+def render(data, target):
+    """
+    Build the (status, JSON body) response for a request target.
+    """
+    url = urlsplit(target)
+    try:
+        payload = route(data, url.path, parse_qs(url.query))
+    except ApiError as e:
+        return e.status, json.dumps({"error": str(e)}).encode("utf-8")
+    header = {"version": data["version"], "season": data.get("season"), "gameweek": data.get("gameweek")}
+    return 200, json.dumps({**header, **payload}).encode("utf-8")
+
+
+class ApiServer:
+    """
+    Serve JSON queries over the live data version.
+
+    Responses are cached per request for the live version, so repeated bot
+    queries cost a dict lookup on the event loop; the cache is dropped when
+    a new version is swapped in. Cache misses are built in a worker thread
+    so slow queries never stall other connections. Manager histories come
+    from the FPL API through the shared single-flight history cache instead.
+    """
+
+    def __init__(self, holder=None, history=None):
+        self.holder = holder or data_version.SnapshotHolder()
+        self.history = history or manager_history.default_cache()
+        self.cache = OrderedDict()
+        self.cache_version = None
+
+    async def respond_history(self, entry_id):
+        # Shielded, so a client hanging up never cancels a fetch other clients are waiting on
+        try:
+            data = await asyncio.shield(asyncio.wrap_future(self.history.request(entry_id)))
+        except requests.RequestException as e:
+            if getattr(e.response, "status_code", None) == 404:
+                return 404, json.dumps({"error": f"No FPL manager with ID {entry_id}"}).encode("utf-8")
+            return 502, json.dumps({"error": "FPL API unavailable"}).encode("utf-8")
+        return 200, json.dumps({"entry": entry_id, **data}).encode("utf-8")
+
+    async def respond(self, target):
+        try:
+            entry_id = history_entry(urlsplit(target).path)
+        except ApiError as e:
+            return e.status, json.dumps({"error": str(e)}).encode("utf-8")
+        if entry_id is not None:
+            return await self.respond_history(entry_id)
+
+        data = self.holder.current()
+        if data["version"] != self.cache_version:
+            self.cache.clear()
+            self.cache_version = data["version"]
+
+        body = self.cache.get(target)
+        if body is not None:
+            self.cache.move_to_end(target)
+            return 200, body
+
+        status, body = await asyncio.to_thread(render, data, target)
+        if status == 200 and self.cache_version == data["version"]:
+            self.cache[target] = body
+            if len(self.cache) > CACHE_SIZE:
+                self.cache.popitem(last=False)
+        return status, body
+
+    async def handle(self, reader, writer):
+        start = time.perf_counter()
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+            while (await asyncio.wait_for(reader.readline(), READ_TIMEOUT)) not in (b"\r\n", b"\n", b""):
+                pass  # Headers are not needed
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except (asyncio.TimeoutError, ValueError, ConnectionError):
+            writer.close()
+            return
+
+        if method != "GET":
+            status, body = 405, json.dumps({"error": "Only GET is supported"}).encode("utf-8")
+        else:
+            try:
+                status, body = await self.respond(target)
+            except Exception as e:
+                logging.error(f"Error serving {target}: {e}")
+                status, body = 500, json.dumps({"error": "Internal server error"}).encode("utf-8")
+
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 502: "Bad Gateway"}.get(status, "Internal Server Error")
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+        logging.debug(f"{method} {target} {status} {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    async def watch_versions(self):
+        while True:
+            await asyncio.sleep(RELOAD_INTERVAL)
+            self.holder.check_for_update()
+
+    async def serve(self, host=HOST, port=PORT):
+        await asyncio.to_thread(self.holder.current)  # Load the snapshot before accepting traffic
+        server = await asyncio.start_server(self.handle, host, port)
+        logging.info(f"Serving data version {self.holder.current()['version']} on http://{host}:{port}")
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.watch_versions())
+
+
+# Main execution
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Serve leaderboards, lookups and aggregates as JSON.")
+    parser.add_argument("--host", default=HOST, help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=PORT, help="Port to listen on")
+    parser.add_argument("--nice", type=int, default=NICE_INCREMENT, help="CPU niceness added so the dashboard wins under load")
+    args = parser.parse_args()
+
+    if args.nice and hasattr(os, "nice"):
+        os.nice(args.nice)
+    asyncio.run(ApiServer().serve(args.host, args.port))
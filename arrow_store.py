@@ -0,0 +1,162 @@
+import pyarrow as pa
+import numpy as np
+import pandas as pd
+import threading
+import logging
+import json
+import os
+import query_engine
+import profiling
+
+# Constants
+ARROW_SUFFIX = ".arrow"
+
+# Columns returned by leaderboard queries, matching query_engine.top_n
+LEADERBOARD_COLUMNS = [
+    "rank", "entry", "entry_name", "player_name", "event_total", "total", "last_rank",
+    "summary_overall_rank", "years_active", "favourite_team_name",
+]
+
+# Columns returned by ID lookups, matching query_engine.lookup_entry
+LOOKUP_COLUMNS = [
+    "entry_name", "rank", "total", "event_total", "years_active", "favourite_team_name",
+    "last_rank", "summary_overall_rank",
+]
+
+_datasets = {}
+_lock = threading.Lock()
+
+
+@profiling.profiled("store.arrow")
+def build_dataset(csv_path, arrow_path, teams=None):
+    """
+    Write the cleaned CSV as an Arrow IPC file that readers memory-map.
+
+    Rows are stored by total points, best first, so the total leaderboard is
+    a prefix of the file. The derived indexes are stored as extra columns:
+
+    - idx_event_row: row positions by gameweek points, best first
+    - idx_team_row: row positions grouped by favourite team, by total inside
+      each team; each team's range is kept in the schema metadata
+    - idx_entry_key / idx_entry_row: sorted FPL IDs and their rows, for
+      binary-search lookups
+
+    The file is uncompressed and written as a single record batch, so every
+    column maps straight from the page cache without decoding or copying.
+    """
+    frame = pd.concat(
+        [query_engine.prepare_chunk(chunk, teams or query_engine.EPL_TEAMS)
+         for chunk in pd.read_csv(csv_path, chunksize=query_engine.CHUNK_SIZE)],
+        ignore_index=True,
+    )
+    frame = frame.iloc[np.argsort(-frame["total"].to_numpy(), kind="stable")].reset_index(drop=True)
+
+    event_row = np.argsort(-frame["event_total"].to_numpy(), kind="stable")
+    team_codes, team_labels = pd.factorize(frame["favourite_team_name"], sort=True)
+    team_row = np.argsort(team_codes, kind="stable")  # Rows are already by total, so each team stays ordered
+    team_sizes = np.bincount(team_codes, minlength=len(team_labels))
+    team_offsets = {
+        team: [int(end - size), int(end)]
+        for team, size, end in zip(team_labels, team_sizes, np.cumsum(team_sizes))
+    }
+    entry_row = np.argsort(frame["entry"].to_numpy(), kind="stable")
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    table = table.append_column("idx_event_row", pa.array(event_row, pa.int32()))
+    table = table.append_column("idx_team_row", pa.array(team_row, pa.int32()))
+    table = table.append_column("idx_entry_key", pa.array(frame["entry"].to_numpy()[entry_row], pa.int64()))
+    table = table.append_column("idx_entry_row", pa.array(entry_row, pa.int32()))
+    table = table.replace_schema_metadata({"team_offsets": json.dumps(team_offsets)}).combine_chunks()
+
+    tmp_path = f"{arrow_path}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+    os.replace(tmp_path, arrow_path)
+    logging.info(f"Arrow dataset saved to {arrow_path} ({table.num_rows} rows)")
+    return arrow_path
+
+
+def open_dataset(arrow_path):
+    """
+    Return the memory-mapped table for a dataset file, opening it once per process.
+
+    Columns point into the mapped file, so every process reading the same
+    version shares one copy in the OS page cache.
+    """
+    table = _datasets.get(arrow_path)
+    if table is None:
+        with _lock:
+            table = _datasets.get(arrow_path)
+            if table is None:
+                table = pa.ipc.open_file(pa.memory_map(arrow_path, "r")).read_all()
+                _datasets[arrow_path] = table
+    return table
+
+
+def close_dataset(arrow_path):
+    """
+    Drop a dataset from the process cache once no snapshot uses it.
+    """
+    with _lock:
+        _datasets.pop(arrow_path, None)
+
+
+def _column(table, name):
+    # Single-chunk, null-free numeric columns convert without copying
+    return table.column(name).chunk(0).to_numpy(zero_copy_only=True)
+
+
+def _team_range(table, team):
+    offsets = json.loads(table.schema.metadata[b"team_offsets"])
+    return offsets.get(team, [0, 0])
+
+
+def top_n(arrow_path, order_column, limit, team=None):
+    """
+    Return the top managers by total or gameweek points, optionally for one favourite team.
+    """
+    table = open_dataset(arrow_path)
+    if team:
+        if order_column != "total":
+            raise ValueError(f"Unsupported team order column: {order_column}")
+        start, end = _team_range(table, team)
+        rows = _column(table, "idx_team_row")[start:min(end, start + limit)]
+    elif order_column == "total":
+        return table.slice(0, limit).select(LEADERBOARD_COLUMNS).to_pandas()
+    elif order_column == "event_total":
+        rows = _column(table, "idx_event_row")[:limit]
+    else:
+        raise ValueError(f"Unsupported column: {order_column}")
+    return table.take(rows).select(LEADERBOARD_COLUMNS).to_pandas()
+
+
+def entries(arrow_path, team=None, limit=None):
+    """
+    Return FPL IDs ordered by total points, optionally for one favourite team.
+    """
+    table = open_dataset(arrow_path)
+    entry_ids = _column(table, "entry")
+    if team:
+        start, end = _team_range(table, team)
+        entry_ids = entry_ids[_column(table, "idx_team_row")[start:end]]
+    return entry_ids[:limit].tolist()
+
+
+def lookup_entry(arrow_path, entry_id):
+    """
+    Return the stored row for an FPL ID (entry) by binary search over the entry index.
+    """
+    table = open_dataset(arrow_path)
+    keys = _column(table, "idx_entry_key")
+    position = np.searchsorted(keys, entry_id)
+    rows = []
+    if position < len(keys) and keys[position] == entry_id:
+        rows = [_column(table, "idx_entry_row")[position]]
+    return table.take(pa.array(rows, pa.int32())).select(LOOKUP_COLUMNS).to_pandas()
+
+
+# Main execution
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    build_dataset(query_engine.DATA_FILE, os.path.splitext(query_engine.DB_FILE)[0] + ARROW_SUFFIX)
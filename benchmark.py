@@ -0,0 +1,226 @@
+import numpy as np
+import pandas as pd
+import tracemalloc
+import subprocess
+import tempfile
+import argparse
+import logging
+import shutil
+import json
+import time
+import sys
+import os
+import synthetic_league
+import query_engine
+import arrow_store
+import data_version
+
+# Constants
+SIZES = [1_000_000, 5_000_000, 10_000_000]
+RESULTS_DIR = "benchmark_results"
+REPEAT = 3  # Timed runs per measurement; the best is kept
+LOOKUPS = 200  # Random FPL IDs looked up per lookup benchmark
+SEARCH_TERMS = ["kamau", "otieno gunners", "wanjiru tuskers", "mwa"]
+SEASON, GAMEWEEK = "2024-25", synthetic_league.DEFAULT_GAMEWEEK
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+COUNTRY_FILE = "fpl_country_data_with_country_codes.csv"  # Read by the cleaning export step
+
+
+def measure(func, repeat=REPEAT):
+    """
+    Time a call (best of `repeat` runs) and trace its peak Python allocations in one more run.
+
+    Allocations made inside SQLite are not traced, so peak_bytes covers the
+    Python and NumPy side of a query only.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"wall_s": round(min(times), 5), "peak_bytes": peak}
+
+
+def run_cleaning(workdir):
+    """
+    Run data_cleaning.py on the workdir's league_players.csv with profiling enabled.
+
+    Returns the wall time, the process's peak RSS and the per-step timings
+    from the profiling report. Allocation tracing is left off so step times
+    are not inflated; peak RSS covers memory instead.
+    """
+    report_path = os.path.join(workdir, "profile_report.json")
+    log_path = os.path.join(workdir, "data_cleaning.log")
+    env = {
+        **os.environ, "FPL_PROFILE": "1", "FPL_PROFILE_SAMPLER": "0", "FPL_PROFILE_MEMORY": "0",
+        "FPL_PROFILE_REPORT": report_path,
+    }
+    command = [sys.executable, os.path.join(REPO_DIR, "data_cleaning.py"), "--season", SEASON, "--gameweek", str(GAMEWEEK)]
+
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        process = subprocess.Popen(command, cwd=workdir, stdout=log, stderr=subprocess.STDOUT, env=env)
+        _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(f"data_cleaning.py failed with exit code {process.returncode}, see {log_path}")
+
+    with open(report_path, "r", encoding="utf-8") as f:
+        sections = json.load(f)["sections"]
+    return {
+        "wall_s": round(wall, 3),
+        "max_rss_bytes": usage.ru_maxrss * 1024,
+        "steps": {
+            name: {"wall_s": round(stats["wall_s"], 4), "cpu_s": round(stats["cpu_s"], 4)}
+            for name, stats in sections.items()
+        },
+    }
+
+
+def bench_size(n_managers, workdir):
+    """
+    Benchmark generation, cleaning, loading, aggregates, leaderboards and search at one league size.
+    """
+    result = {}
+    csv_path = os.path.join(workdir, "league_players.csv")
+    shutil.copy(os.path.join(REPO_DIR, COUNTRY_FILE), workdir)
+
+    logging.info(f"[{n_managers}] Generating synthetic league...")
+    start = time.perf_counter()
+    synthetic_league.generate_league(n_managers, csv_path)
+    result["generate"] = {"wall_s": round(time.perf_counter() - start, 3), "csv_bytes": os.path.getsize(csv_path)}
+
+    logging.info(f"[{n_managers}] Cleaning and publishing...")
+    result["cleaning"] = run_cleaning(workdir)
+
+    manifest = data_version.read_manifest(os.path.join(workdir, data_version.MANIFEST_FILE))
+    db_file = os.path.join(workdir, manifest["db_file"])
+    arrow_file = os.path.join(workdir, manifest["arrow_file"])
+    manifest = {**manifest, "db_file": db_file, "arrow_file": arrow_file}
+    cleaned_csv = os.path.join(workdir, "cleaned_league_players.csv")
+
+    def open_arrow():
+        arrow_store.close_dataset(arrow_file)
+        arrow_store.open_dataset(arrow_file)
+
+    logging.info(f"[{n_managers}] Loading...")
+    result["load"] = {
+        "csv_parse": measure(lambda: pd.read_csv(cleaned_csv), repeat=1),
+        "arrow_open": measure(open_arrow),
+        "snapshot": measure(lambda: data_version.load_snapshot(manifest), repeat=1),
+    }
+
+    logging.info(f"[{n_managers}] Overview aggregates...")
+    result["aggregates"] = {
+        "overview_stats": measure(lambda: query_engine.overview_stats(db_file)),
+        "total_histogram": measure(lambda: query_engine.histogram(db_file, "total")),
+        "rank_histogram": measure(lambda: query_engine.histogram(db_file, "summary_overall_rank", min_value=0)),
+        "signups_by_date": measure(lambda: query_engine.signups_by_date(db_file)),
+        "team_counts": measure(lambda: query_engine.team_counts(db_file)),
+        "team_box_stats": measure(lambda: query_engine.box_stats(db_file, "favourite_team_name")),
+        "years_box_stats": measure(lambda: query_engine.box_stats(db_file, "years_active")),
+        "rank_movers": measure(lambda: query_engine.all_rank_movers(db_file)),
+    }
+
+    logging.info(f"[{n_managers}] Leaderboards...")
+    team = query_engine.EPL_TEAMS[0]
+    result["leaderboards"] = {
+        "sqlite_total": measure(lambda: query_engine.top_n(db_file, "total", 100)),
+        "sqlite_event_total": measure(lambda: query_engine.top_n(db_file, "event_total", 100)),
+        "sqlite_team_total": measure(lambda: query_engine.top_n(db_file, "total", 100, team)),
+        "arrow_total": measure(lambda: arrow_store.top_n(arrow_file, "total", 100)),
+        "arrow_event_total": measure(lambda: arrow_store.top_n(arrow_file, "event_total", 100)),
+        "arrow_team_total": measure(lambda: arrow_store.top_n(arrow_file, "total", 100, team)),
+    }
+
+    logging.info(f"[{n_managers}] Search...")
+    entry_ids = np.random.default_rng(0).choice(arrow_store.entries(arrow_file), LOOKUPS).tolist()
+    result["search"] = {
+        "sqlite_id_lookups": measure(lambda: [query_engine.lookup_entry(db_file, e) for e in entry_ids]),
+        "arrow_id_lookups": measure(lambda: [arrow_store.lookup_entry(arrow_file, e) for e in entry_ids]),
+        **{f"name:{term}": measure(lambda term=term: query_engine.search_names(db_file, term)) for term in SEARCH_TERMS},
+    }
+    result["search"]["lookups_per_run"] = LOOKUPS
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results, prefix=""):
+    """
+    Flatten nested results to {"size/group/name": wall_s} for comparison.
+    """
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict) and "wall_s" in value:
+            flat[f"{prefix}{key}"] = value["wall_s"]
+        if isinstance(value, dict):
+            flat.update(flatten({k: v for k, v in value.items() if k != "wall_s"}, f"{prefix}{key}/"))
+    return flat
+
+
+def compare(previous, current):
+    """
+    Print wall-time changes against a previous run for every shared measurement.
+    """
+    before, after = flatten(previous["sizes"]), flatten(current["sizes"])
+    print(f"Compared with {previous.get('commit') or 'unknown commit'} ({previous['run_at']}):")
+    for key in after:
+        if key in before and before[key] > 0:
+            print(f"  {key:60s} {before[key]:>10.4f}s -> {after[key]:>10.4f}s  ({after[key] / before[key]:.2f}x)")
+
+
+def save_results(results, results_dir=RESULTS_DIR):
+    """
+    Write a run's results to its own JSON file and return the latest earlier run, if any.
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    earlier = sorted(name for name in os.listdir(results_dir) if name.endswith(".json"))
+    previous = None
+    if earlier:
+        with open(os.path.join(results_dir, earlier[-1]), "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    path = os.path.join(results_dir, f"{time.strftime('%Y%m%dT%H%M%S')}-{results['commit'] or 'nocommit'}.json")
+    data_version.write_json_atomic(path, results)
+    logging.info(f"Benchmark results saved to {path}")
+    return previous
+
+
+# Main execution
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Benchmark cleaning and dashboard queries on synthetic leagues.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="League sizes to benchmark")
+    parser.add_argument("--workdir", help="Directory for generated data (default: a temporary directory)")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated data after each size")
+    args = parser.parse_args()
+
+    results = {
+        "run_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "sizes": {},
+    }
+    for n_managers in args.sizes:
+        workdir = tempfile.mkdtemp(prefix=f"fpl-bench-{n_managers}-", dir=args.workdir)
+        try:
+            results["sizes"][str(n_managers)] = bench_size(n_managers, workdir)
+        finally:
+            if not args.keep:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    previous = save_results(results)
+    if previous:
+        compare(previous, results)
@@ -0,0 +1,343 @@
+import plotly.express as px
+import plotly.graph_objects as go
+import pandas as pd
+
+# Constants
+COUNTRY_FILE = "fpl_country_data_with_country_codes.csv"
+
+
+def load_country_data(file_path=COUNTRY_FILE):
+    """
+    Load the per-country FPL manager counts.
+    """
+    return pd.read_csv(file_path)
+
+
+def total_points_histogram(data):
+    """
+    Histogram of total points, from the store's bins.
+    """
+    # Create the histogram for distribution of total points (binned in the store)
+    total_bins = data["total_bins"]
+    fig = px.bar(
+        total_bins,
+        x=(total_bins["bin_start"] + total_bins["bin_end"]) / 2,
+        y="count",
+        title="Distribution of Total Points",
+        labels={"x": "Total Points", "count": "Number of Players"},
+        template="plotly_dark",
+        color_discrete_sequence=["royalblue"],  # Aesthetic bar color
+    )
+    fig.update_traces(width=total_bins["bin_end"] - total_bins["bin_start"])
+
+    # Customize the layout
+    fig.update_layout(
+        title=dict(
+            text="Distribution of Total Points",
+            # x=0.5,  # Center the title
+            font=dict(size=20)
+        ),
+        xaxis=dict(
+            title="Total Points",
+            tickformat=",",  # Add commas for better readability of numbers
+            showgrid=False,  # Remove gridlines for a cleaner look
+        ),
+        yaxis=dict(
+            title="Number of Players",
+            showgrid=True,  # Keep gridlines for Y-axis
+            zeroline=False,  # Remove the line at y=0
+        ),
+        margin=dict(l=50, r=50, t=80, b=50),  # Adjust margins for balance
+        height=600,  # Set a comfortable height for the plot
+        bargap=0,
+    )
+
+    # Add interactive hover template
+    fig.update_traces(
+        hovertemplate="<b>Total Points</b>: %{x}<br><b>Number of Players</b>: %{y}<extra></extra>"
+    )
+    return fig
+
+
+def signup_trend(data):
+    """
+    Line chart of sign-ups per day, with the peak annotated.
+    """
+    #Player Sign Up Trend
+    signups = data["signups"]  # Sign-ups grouped by date in the store
+
+    # Create the line chart
+    fig = px.line(
+        signups,
+        x="joined_date",
+        y="Number of Players",
+        title="Player Sign-Up Trends Over Time",
+        labels={"joined_date": "Date", "Number of Players": "Number of Players"},
+        template="plotly_dark",
+    )
+
+    # Customize the layout
+    fig.update_layout(
+        title=dict(
+            text="Player Sign-Up Trends Over Time",
+            # x=0.5,  # Center the title
+            font=dict(size=20)
+        ),
+        xaxis=dict(
+            title="Date",
+            showgrid=False,  # Remove gridlines for a cleaner look
+            tickangle=-45,  # Tilt date labels for better readability
+        ),
+        yaxis=dict(
+            title="Number of Players",
+            showgrid=True,  # Keep gridlines for Y-axis
+            zeroline=False,  # Remove the line at y=0
+        ),
+        margin=dict(l=50, r=50, t=80, b=50),  # Adjust margins for balance
+        height=600,  # Set a comfortable height for the plot
+    )
+
+    # Add a smoother line
+    fig.update_traces(
+        line=dict(color="royalblue", width=1.5),  # Smoother and thicker line
+        hovertemplate="<b>Date</b>: %{x}<br><b>Number of Players</b>: %{y}<extra></extra>"
+    )
+
+    # Add annotations for key points (e.g., highest sign-ups)
+    max_signups = signups.loc[signups["Number of Players"].idxmax()]
+    fig.add_annotation(
+        x=max_signups["joined_date"],
+        y=max_signups["Number of Players"],
+        text=f"Peak: {max_signups['Number of Players']} players",
+        showarrow=True,
+        arrowhead=2,
+        ax=-50,
+        ay=-50,
+        font=dict(color="white", size=12),
+        arrowcolor="white",
+    )
+    return fig
+
+
+def favourite_teams(data):
+    """
+    Bar chart of managers per favourite team.
+    """
+    #  Favorite Teams of Players
+    # Count favorite teams (team names are mapped when the store is built)
+    favorite_team_counts = data["team_counts"]
+    # Create a Plotly bar chart with a gradient color scheme
+    fig = px.bar(
+        favorite_team_counts,
+        x="Number of Players",
+        y="Team",
+        orientation="h",
+        title="Favorite Teams of Players",
+        color="Number of Players",  # Use player count for a gradient color
+        color_continuous_scale="Blues",  # Use a visually appealing gradient
+        template="plotly_dark",
+        labels={"Number of Players": "Number of Players", "Team": "Team"}
+    )
+
+    # Customize layout
+    fig.update_layout(
+        title=dict(
+            text="Favorite Teams of Players",
+            # x=0.5,  # Center align the title
+            font=dict(size=20)
+        ),
+        xaxis=dict(
+            title="Number of Players",
+            tickformat=",.0f",  # Add comma formatting for large numbers
+            showgrid=False  # Remove grid lines for a cleaner look
+        ),
+        yaxis=dict(
+            title="",
+            showgrid=False,
+            categoryorder="total ascending"  # Sort teams by total players
+        ),
+        height=800,  # Adjust height for better spacing
+        margin=dict(l=100, r=50, t=80, b=50),  # Adjust margins for cleaner spacing
+        coloraxis_colorbar=dict(
+            title="Player Count",
+            ticks="inside",  # Show ticks inside the color bar
+            len=0.5  # Adjust the size of the color bar
+        )
+    )
+    return fig
+
+
+def team_points_boxes(data):
+    """
+    Box plots of total points per favourite team.
+    """
+    #Total Points Distribution by Favorite Team
+    # Box statistics are computed in the store, so only one row per team is loaded
+    team_boxes = data["team_boxes"]
+    fig = go.Figure()
+    for i, box in enumerate(team_boxes.itertuples(index=False)):
+        fig.add_trace(go.Box(
+            name=box.grp,
+            q1=[box.q1], median=[box.median], q3=[box.q3],
+            lowerfence=[box.lower_fence], upperfence=[box.upper_fence],
+            marker_color=px.colors.qualitative.Set3[i % len(px.colors.qualitative.Set3)],
+        ))
+
+    fig.update_layout(
+        title="Total Points Distribution by Favorite Team",
+        template="plotly_dark",
+        # title_x=0.5,
+        font=dict(size=20),
+        xaxis=dict(title="Favorite Team", tickangle=-45),  # Tilt team names for readability
+        yaxis=dict(title="Total Points"),
+        height=600,
+    )
+    return fig
+
+
+def years_active_boxes(data):
+    """
+    Box plots of total points per years active.
+    """
+    #Years active vs total points
+    years_boxes = data["years_boxes"]
+    fig = go.Figure()
+    for box in years_boxes.itertuples(index=False):
+        fig.add_trace(go.Box(
+            name=str(box.grp),
+            q1=[box.q1], median=[box.median], q3=[box.q3],
+            lowerfence=[box.lower_fence], upperfence=[box.upper_fence],
+        ))
+
+    fig.update_layout(
+        title="Distribution of Total Points by Years Active",
+        template="plotly_dark",
+        # title_x=0.5,
+        font=dict(size=20),
+        xaxis=dict(title="Years Active"),
+        yaxis=dict(title="Total Points"),
+        height=600,
+    )
+    return fig
+
+
+def global_rank_histogram(data):
+    """
+    Histogram of overall (global) ranks, from the store's bins.
+    """
+    #Global Rank Distribution
+    # Remove invalid ranks (e.g., missing or zero values) while binning in the store
+    rank_bins = data["rank_bins"]
+
+    # Create a histogram
+    fig = px.bar(
+        rank_bins,
+        x=(rank_bins["bin_start"] + rank_bins["bin_end"]) / 2,
+        y="count",
+        title="Global Rank Distribution",
+        labels={"x": "Global Rank", "count": "Number of Players"},
+        template="plotly_dark",
+        color_discrete_sequence=["royalblue"],  # Aesthetic bar color
+    )
+    fig.update_traces(width=rank_bins["bin_end"] - rank_bins["bin_start"])
+
+
+    # Customize the layout
+    fig.update_layout(
+        title=dict(
+            text="Global Rank Distribution",
+            # x=0.5,  # Center the title
+            font=dict(size=20)
+        ),
+        xaxis=dict(
+            title="Global Rank",
+            # type="log",
+            showgrid=False,  # Remove gridlines for a cleaner look
+            tickformat=",",  # Format numbers with commas
+        ),
+        yaxis=dict(
+            title="Number of Players",
+            showgrid=True,  # Keep gridlines for Y-axis
+            zeroline=False,  # Remove the line at y=0
+        ),
+        margin=dict(l=50, r=50, t=80, b=50),  # Adjust margins for balance
+        height=600,  # Set a comfortable height for the plot
+        bargap=0,
+    )
+
+    # Add interactive hover template
+    fig.update_traces(
+        hovertemplate="<b>Global Rank</b>: %{x}<br><b>Number of Players</b>: %{y}<extra></extra>"
+    )
+    return fig
+
+
+def top_countries(country_data):
+    """
+    Bar chart of the 10 countries with the most FPL managers.
+    """
+    # Global Distribution of FPL Players
+    top_10_countries = country_data.nlargest(10, "National League Player Count")
+    # Create a horizontal bar chart to show the number of players in each country
+    fig = px.bar(
+        top_10_countries,
+        x="National League Player Count",  # Number of players
+        y="Country",  # Country names
+        title="Top 10 Countries by Number of FPL Players",
+        labels={"National League Player Count": "Number of Players", "Country": "Country"},
+        template="plotly_dark",  # Dark theme for aesthetics
+        color="National League Player Count",  # Color bars based on player count
+        color_continuous_scale="Viridis",  # Color scale from yellow to red
+    )
+
+    # Customize the layout
+    fig.update_layout(
+        title=dict(
+            text="Top 10 Countries by Number of FPL Players",
+            # x=0.5,  # Center the title
+            font=dict(size=20)
+        ),
+        xaxis=dict(
+            title="Number of Players",
+            tickformat=",",  # Format numbers with commas for readability
+        ),
+        yaxis=dict(
+            title="",
+            categoryorder="total ascending",  # Sort by the number of players in ascending order
+        ),
+        height=800,  # Adjust the height for a better view
+        margin=dict(l=150, r=50, t=50, b=50),  # Adjust margins for proper spacing
+    )
+    return fig
+
+
+def rank_history(gameweeks):
+    """
+    Line chart of a manager's overall rank by gameweek, best rank at the top.
+    """
+    fig = px.line(
+        gameweeks,
+        x="event",
+        y="overall_rank",
+        markers=True,
+        title="Overall Rank by Gameweek",
+        labels={"event": "Gameweek", "overall_rank": "Overall Rank"},
+        template="plotly_dark",
+    )
+    fig.update_layout(
+        yaxis=dict(autorange="reversed", tickformat=","),  # Rank 1 at the top
+        height=400,
+    )
+    fig.update_traces(line=dict(color="royalblue", width=1.5))
+    return fig
+
+
+# Overview charts in page order, as (name, builder taking the snapshot)
+OVERVIEW_CHARTS = [
+    ("total_points_histogram", total_points_histogram),
+    ("signup_trend", signup_trend),
+    ("favourite_teams", favourite_teams),
+    ("team_points_boxes", team_points_boxes),
+    ("years_active_boxes", years_active_boxes),
+    ("global_rank_histogram", global_rank_histogram),
+]
@@ -3,18 +3,31 @@ import threading
 import logging
 import csv
 import time
+import argparse
+import response_archive
+import fetch_logging
 
 # Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[logging.FileHandler('fpl_national_league_fetch.log'), logging.StreamHandler()]
-)
+fetch_logging.configure('fpl_national_league_fetch.log')
 
 # Input and output CSV files
 input_file = 'fpl_country_data.csv'
 output_file = 'fpl_country_data_with_counts.csv'
 
+# Function to extract the national league's rank_count from an entry response
+def extract_rank_count(data, entry_id):
+    national_league = next(
+        (league for league in data.get('leagues', {}).get('classic', []) if "region" in league.get('short_name', "")),
+        None
+    )
+
+    if national_league:
+        rank_count = national_league.get('rank_count', None)
+        return rank_count
+    else:
+        logging.warning(f"No national league data found for Entry ID: {entry_id}", extra={"rate_key": "no national league"})
+        return None
+
 # Function to fetch national league data
 def fetch_national_league_data(entry_id):
     url = f"https://fantasy.premierleague.com/api/entry/{entry_id}/"
@@ -22,27 +35,24 @@ def fetch_national_league_data(entry_id):
         response = requests.get(url, timeout=10)
         response.raise_for_status()  # Raise HTTPError for bad responses (4xx and 5xx)
         data = response.json()
-
-        # Extract the national league's rank_count
-        national_league = next(
-            (league for league in data.get('leagues', {}).get('classic', []) if "region" in league.get('short_name', "")),
-            None
-        )
-
-        if national_league:
-            rank_count = national_league.get('rank_count', None)
-            return rank_count
-        else:
-            logging.warning(f"No national league data found for Entry ID: {entry_id}")
-            return None
+        response_archive.record("entry", entry_id, data)  # Keep the full response for offline replay
+        return extract_rank_count(data, entry_id)
     except Exception as e:
-        logging.error(f"Error fetching Entry ID {entry_id}: {e}")
+        logging.error(f"Error fetching Entry ID {entry_id}: {e}", extra={"rate_key": "entry error"})
+        return None
+
+# Function to read national league data from the response archive
+def replay_national_league_data(entry_id):
+    data = response_archive.default_archive().get("entry", entry_id)
+    if data is None:
+        logging.warning(f"No archived response for Entry ID: {entry_id}", extra={"rate_key": "no archived response"})
         return None
+    return extract_rank_count(data, entry_id)
 
 # Function to process each row and fetch national league player count
-def process_row(row, results):
+def process_row(row, results, fetch=fetch_national_league_data):
     entry_id = row['First Player Entry']
-    rank_count = fetch_national_league_data(entry_id)
+    rank_count = fetch(entry_id)
     if rank_count is not None:
         row['National League Player Count'] = rank_count
     else:
@@ -59,20 +69,30 @@ def save_to_csv(data):
     logging.info(f"Data saved to {output_file}")
 
 # Main function
-def main():
+def main(replay=False):
     # Read the input CSV
     with open(input_file, mode='r', encoding='utf-8') as file:
         reader = csv.DictReader(file)
         rows = list(reader)
 
+    # Replay reads the archive at disk speed, with no threads or throttling needed
+    if replay:
+        results = []
+        for row in rows:
+            process_row(row, results, fetch=replay_national_league_data)
+        save_to_csv(results)
+        return
+
     threads = []
     results = []  # Shared results list
     lock = threading.Lock()  # Lock to prevent race conditions
+    progress = fetch_logging.Progress("National league counts", total=len(rows))
 
     # Worker function to ensure thread safety
     def thread_worker(row):
         temp_results = []
         process_row(row, temp_results)
+        progress.add("counted" if row['National League Player Count'] != "N/A" else "missing")
         with lock:
             results.extend(temp_results)
 
@@ -86,9 +106,13 @@ def main():
     # Wait for all threads to complete
     for thread in threads:
         thread.join()
+    progress.close()
 
     # Save results to CSV
     save_to_csv(results)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Fetch national league player counts.")
+    parser.add_argument("--replay", action="store_true", help="Re-run extraction from the response archive instead of the API")
+    args = parser.parse_args()
+    main(replay=args.replay)
@@ -1,632 +1,513 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import numpy as np
-import plotly.graph_objects as go
+import os
+import snapshot_export
+import query_engine
+import arrow_store
+import data_version
+import profiling
 
 # Set page configuration
 st.set_page_config(page_title="League Dashboard", layout="centered")
 
-# Load the data
-DATA_FILE = "cleaned_league_players.csv"
+# How often open sessions check the data-version manifest, in seconds
+RELOAD_INTERVAL = 60
 
-@st.cache_data
-def load_data():
-    return pd.read_csv(DATA_FILE)
+# How often a pending manager history is checked, in seconds
+HISTORY_POLL_INTERVAL = 1
 
-df = load_data()
-# Title
-st.title("FPL Kenya")
-# Overview Tab
-tab1, tab2, tab3 = st.tabs(["Overview", "Leaderboards", "Search"])
+# Dashboard views
+VIEWS = ["Overview", "Leaderboards", "Search", "Movers"]
 
-with tab1:
-    
-    
-    # Main Summary
-    total_players = df.shape[0]
-    avg_points = df["total"].mean()
-    gw20_avg = df["event_total"].mean()
-    years_active = df["years_active"].mean()
-    st.caption("General Overview")
-     # Custom CSS for responsive and aligned metrics
-    st.markdown(
-        """
-        <style>
-        /* Responsive container for metrics */
-        .metrics-container {
-            display: flex;
-            flex-wrap: wrap;
-            justify-content: center;
-            gap: 20px;
-            margin-bottom: 30px;
-        }
-        .metric-box {
+# Shared across sessions (and with the boot-time prewarm): new data versions are loaded in the background and swapped in atomically
+def get_snapshot_holder():
+    return data_version.default_holder()
+
+# Correct mapping for favorite teams, from the season's team list in the data version
+def team_names_for(data):
+    return {team: team for team in data["teams"]}
+
+# Gameweek label for the data version, e.g. "GW 20"
+def gameweek_label(data):
+    return f"GW {data['gameweek']}" if data.get("gameweek") else "Latest GW"
+
+@st.cache_data
+def load_country_data():
+    import charts
+    return charts.load_country_data()
+
+# Exported figures for the snapshot's version (shared across sessions), or {} to build them live
+def static_figures(data):
+    path = snapshot_export.static_dir(data["db_file"])
+    if not os.path.exists(os.path.join(path, snapshot_export.INDEX_FILE)):
+        return {}
+    return snapshot_export.cached_figures(path)
+
+# Pre-rendered figure if the version was exported; plotly.express is only imported to build one live.
+# `build_input` may be a function, so inputs that cost a load are only produced for a live build.
+def overview_figure(figures, name, build_input):
+    if name in figures:
+        return figures[name]
+    import charts
+    return getattr(charts, name)(build_input() if callable(build_input) else build_input)
+
+# Overview: static per data version, computed only when the view is selected
+def render_overview(data):
+    gw = gameweek_label(data)
+    figures = static_figures(data)
+    with profiling.section("dashboard.overview.summary"):
+        # Main Summary
+        overview = data["overview"]
+        total_players = overview["total_players"]
+        avg_points = overview["avg_points"]
+        gw20_avg = overview["avg_event_points"]
+        years_active = overview["avg_years_active"]
+        st.caption("General Overview")
+         # Custom CSS for responsive and aligned metrics
+        st.markdown(
+            """
+            <style>
+            /* Responsive container for metrics */
+            .metrics-container {
+                display: flex;
+                flex-wrap: wrap;
+                justify-content: center;
+                gap: 20px;
+                margin-bottom: 30px;
+            }
+            .metric-box {
             
-            border-radius: 10px;
-            padding: 15px 20px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            text-align: center;
-            font-family: Arial, sans-serif;
-        }
-        .metric-box h3 {
-            margin: 0;
-            font-size: 18px;
+                border-radius: 10px;
+                padding: 15px 20px;
+                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+                text-align: center;
+                font-family: Arial, sans-serif;
+            }
+            .metric-box h3 {
+                margin: 0;
+                font-size: 18px;
             
-        }
-        .metric-box p {
-            margin: 0;
-            font-size: 24px;
-            font-weight: bold;
+            }
+            .metric-box p {
+                margin: 0;
+                font-size: 24px;
+                font-weight: bold;
             
-        }
-        /* Adjust layout for smaller screens */
-        @media (max-width: 768px) {
-            .metrics-container {
-                flex-direction: column;
             }
-            .metric-box {
-                width: 100%;
+            /* Adjust layout for smaller screens */
+            @media (max-width: 768px) {
+                .metrics-container {
+                    flex-direction: column;
+                }
+                .metric-box {
+                    width: 100%;
+                }
             }
-        }
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
-
-    # HTML structure for metrics
-    st.markdown(
-        f"""
-        <div class="metrics-container">
-            <div class="metric-box">
-                <h3>Total Players</h3>
-                <p>{total_players:,}</p>
-            </div>
-            <div class="metric-box">
-                <h3>Avg. Total Points</h3>
-                <p>{avg_points:.2f}</p>
-            </div>
-            <div class="metric-box">
-                <h3>GW20 Avg.</h3>
-                <p>{gw20_avg:.2f}</p>
-            </div>
-            <div class="metric-box">
-                <h3>Avg. Years Active</h3>
-                <p>{years_active:.1f}</p>
+            </style>
+            """,
+            unsafe_allow_html=True
+        )
+
+        # HTML structure for metrics
+        st.markdown(
+            f"""
+            <div class="metrics-container">
+                <div class="metric-box">
+                    <h3>Total Players</h3>
+                    <p>{total_players:,}</p>
+                </div>
+                <div class="metric-box">
+                    <h3>Avg. Total Points</h3>
+                    <p>{avg_points:.2f}</p>
+                </div>
+                <div class="metric-box">
+                    <h3>{gw} Avg.</h3>
+                    <p>{gw20_avg:.2f}</p>
+                </div>
+                <div class="metric-box">
+                    <h3>Avg. Years Active</h3>
+                    <p>{years_active:.1f}</p>
+                </div>
             </div>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
-    # Metric Cards in a grid
-    # col1, col2, col3, col4 = st.columns(4)
-    # with col1:
-    #     st.metric("Total Players", f"{total_players:,}", help="Total number of Kenyan FPL managers.")
-    # with col2:
-    #     st.metric("Average Points", f"{avg_points:.2f}", help="The average total points of Kenyan managers.")
-    # with col3:
-    #     st.metric("GW 20 Avg", f"{gw20_avg:.2f}", help="Average GW 20 points of Kenyan managers.")
-    # with col4:
-    #     st.metric("Years Active (Avg)", f"{df['years_active'].mean():.1f}", help="Average years active per player.")
-
-    # Add some spacing
-    st.markdown("---")
-
-    # Create the histogram for distribution of total points
-    fig = px.histogram(
-        df,
-        x="total",
-        nbins=50,  # Number of bins for better granularity
-        title="Distribution of Total Points",
-        labels={"total": "Total Points", "count": "Number of Players"},
-        template="plotly_dark",
-        color_discrete_sequence=["royalblue"],  # Aesthetic bar color
-    )
-
-    # Customize the layout
-    fig.update_layout(
-        title=dict(
-            text="Distribution of Total Points",
-            # x=0.5,  # Center the title
-            font=dict(size=20)
-        ),
-        xaxis=dict(
-            title="Total Points",
-            tickformat=",",  # Add commas for better readability of numbers
-            showgrid=False,  # Remove gridlines for a cleaner look
-        ),
-        yaxis=dict(
-            title="Number of Players",
-            showgrid=True,  # Keep gridlines for Y-axis
-            zeroline=False,  # Remove the line at y=0
-        ),
-        margin=dict(l=50, r=50, t=80, b=50),  # Adjust margins for balance
-        height=600,  # Set a comfortable height for the plot
-    )
-
-    # Add interactive hover template
-    fig.update_traces(
-        hovertemplate="<b>Total Points</b>: %{x}<br><b>Number of Players</b>: %{y}<extra></extra>"
-    )
-
-    # Display the chart in Streamlit
-    st.plotly_chart(fig, use_container_width=True)
-    st.markdown("---")
-
-    #Player Sign Up Trend
-        # Prepare data
-    df["joined_time"] = pd.to_datetime(df["joined_time"])  # Ensure joined_time is datetime
-    df["joined_date"] = df["joined_time"].dt.date  # Extract date
-    signups = df.groupby("joined_date").size().reset_index(name="Number of Players")  # Group by date
-
-    # Create the line chart
-    fig = px.line(
-        signups,
-        x="joined_date",
-        y="Number of Players",
-        title="Player Sign-Up Trends Over Time",
-        labels={"joined_date": "Date", "Number of Players": "Number of Players"},
-        template="plotly_dark",
-    )
-
-    # Customize the layout
-    fig.update_layout(
-        title=dict(
-            text="Player Sign-Up Trends Over Time",
-            # x=0.5,  # Center the title
-            font=dict(size=20)
-        ),
-        xaxis=dict(
-            title="Date",
-            showgrid=False,  # Remove gridlines for a cleaner look
-            tickangle=-45,  # Tilt date labels for better readability
-        ),
-        yaxis=dict(
-            title="Number of Players",
-            showgrid=True,  # Keep gridlines for Y-axis
-            zeroline=False,  # Remove the line at y=0
-        ),
-        margin=dict(l=50, r=50, t=80, b=50),  # Adjust margins for balance
-        height=600,  # Set a comfortable height for the plot
-    )
-
-    # Add a smoother line
-    fig.update_traces(
-        line=dict(color="royalblue", width=1.5),  # Smoother and thicker line
-        hovertemplate="<b>Date</b>: %{x}<br><b>Number of Players</b>: %{y}<extra></extra>"
-    )
-
-    # Add annotations for key points (e.g., highest sign-ups)
-    max_signups = signups.loc[signups["Number of Players"].idxmax()]
-    fig.add_annotation(
-        x=max_signups["joined_date"],
-        y=max_signups["Number of Players"],
-        text=f"Peak: {max_signups['Number of Players']} players",
-        showarrow=True,
-        arrowhead=2,
-        ax=-50,
-        ay=-50,
-        font=dict(color="white", size=12),
-        arrowcolor="white",
-    )
-
-    # Display the chart in Streamlit
-    st.plotly_chart(fig, use_container_width=True)
+            """,
+            unsafe_allow_html=True
+        )
+        # Metric Cards in a grid
+        # col1, col2, col3, col4 = st.columns(4)
+        # with col1:
+        #     st.metric("Total Players", f"{total_players:,}", help="Total number of Kenyan FPL managers.")
+        # with col2:
+        #     st.metric("Average Points", f"{avg_points:.2f}", help="The average total points of Kenyan managers.")
+        # with col3:
+        #     st.metric("GW 20 Avg", f"{gw20_avg:.2f}", help="Average GW 20 points of Kenyan managers.")
+        # with col4:
+        #     st.metric("Years Active (Avg)", f"{df['years_active'].mean():.1f}", help="Average years active per player.")
+
+        # Add some spacing
+        st.markdown("---")
+
+    with profiling.section("dashboard.overview.total_points_histogram"):
+        fig = overview_figure(figures, "total_points_histogram", data)
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown("---")
+
+    with profiling.section("dashboard.overview.signups"):
+        fig = overview_figure(figures, "signup_trend", data)
+        st.plotly_chart(fig, use_container_width=True)
     
-    st.markdown("---")
-
-    #  Favorite Teams of Players
-    # Ensure the 'favourite_team' column is numeric (convert strings to NaN where invalid)
-    df["favourite_team"] = pd.to_numeric(df["favourite_team"], errors="coerce")
-
-    # Map favorite team indices to EPL team names
-    epl_teams = [
-       "Arsenal", "Aston Villa", "Bournemouth", "Brentford", "Brighton & Hove Albion", "Chelsea", "Crystal Palace", "Everton", "Fulham", "Ipswich Town", "Leicester City", "Liverpool", "Manchester City", "Manchester United", "Newcastle United", "Nottingham Forest", "Southampton", "Tottenham Hotspur", "West Ham United", "Wolverhampton Wanderers"
-    ]
-
-    df["favourite_team_name"] = df["favourite_team"].apply(
-        lambda x: epl_teams[int(x) - 1] if pd.notnull(x) and 0 < int(x) <= len(epl_teams) else "Unknown"
-    )
-
-    # Count favorite teams
-    favorite_team_counts = df["favourite_team_name"].value_counts().reset_index()
-    favorite_team_counts.columns = ["Team", "Number of Players"]
-    # Create a Plotly bar chart with a gradient color scheme
-    fig = px.bar(
-        favorite_team_counts,
-        x="Number of Players",
-        y="Team",
-        orientation="h",
-        title="Favorite Teams of Players",
-        color="Number of Players",  # Use player count for a gradient color
-        color_continuous_scale="Blues",  # Use a visually appealing gradient
-        template="plotly_dark",
-        labels={"Number of Players": "Number of Players", "Team": "Team"}
-    )
-    
-
-    # Customize layout
-    fig.update_layout(
-        title=dict(
-            text="Favorite Teams of Players",
-            # x=0.5,  # Center align the title
-            font=dict(size=20)
-        ),
-        xaxis=dict(
-            title="Number of Players",
-            tickformat=",.0f",  # Add comma formatting for large numbers
-            showgrid=False  # Remove grid lines for a cleaner look
-        ),
-        yaxis=dict(
-            title="",
-            showgrid=False,
-            categoryorder="total ascending"  # Sort teams by total players
-        ),
-        height=800,  # Adjust height for better spacing
-        margin=dict(l=100, r=50, t=80, b=50),  # Adjust margins for cleaner spacing
-        coloraxis_colorbar=dict(
-            title="Player Count",
-            ticks="inside",  # Show ticks inside the color bar
-        len=0.5  # Adjust the size of the color bar
-    )
-)
-
-    # Display the chart in Streamlit
-    st.plotly_chart(fig, use_container_width=True)
-    st.markdown("---")
-
-    #Total Points Distribution by Favorite Team
-    fig = px.box(
-    df,
-    x="favourite_team_name",
-    y="total",
-    title="Total Points Distribution by Favorite Team",
-    labels={"favourite_team_name": "Favorite Team", "total": "Total Points"},
-    template="plotly_dark",
-    color="favourite_team_name",
-    color_discrete_sequence=px.colors.qualitative.Set3,
-)
-
-    fig.update_layout(
-        # title_x=0.5,
-        font=dict(size=20),
-        xaxis=dict(title="Favorite Team", tickangle=-45),  # Tilt team names for readability
-        yaxis=dict(title="Total Points"),
-        height=600,
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
-    st.markdown("---")
-
-    #Years active vs total points
-    fig = px.box(
-    df,
-    x="years_active",
-    y="total",
-    title="Distribution of Total Points by Years Active",
-    labels={"years_active": "Years Active", "total": "Total Points"},
-    template="plotly_dark",
-    color="years_active",
-    # color_continuous_scale="Viridis",
-    )
-
-    fig.update_layout(
-        # title_x=0.5,
-        font=dict(size=20),
-        xaxis=dict(title="Years Active"),
-        yaxis=dict(title="Total Points"),
-        height=600,
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
-    st.markdown("---")
-    #Global Rank Distribution
-    # Remove invalid ranks (e.g., missing or zero values)
-    valid_ranks = df[df["summary_overall_rank"] > 0]  # Filter valid ranks
-
-    # Create a histogram
-    fig = px.histogram(
-        valid_ranks,
-        x="summary_overall_rank",
-        nbins=50,  # Adjust the number of bins for granularity
-        title="Global Rank Distribution",
-        labels={"summary_overall_rank": "Global Rank", "count": "Number of Players"},
-        template="plotly_dark",
-        color_discrete_sequence=["royalblue"],  # Aesthetic bar color
-    )
-
-    
-    # Customize the layout
-    fig.update_layout(
-        title=dict(
-            text="Global Rank Distribution",
-            # x=0.5,  # Center the title
-            font=dict(size=20)
-        ),
-        xaxis=dict(
-            title="Global Rank",
-            # type="log",
-            showgrid=False,  # Remove gridlines for a cleaner look
-            tickformat=",",  # Format numbers with commas
-        ),
-        yaxis=dict(
-            title="Number of Players",
-            showgrid=True,  # Keep gridlines for Y-axis
-            zeroline=False,  # Remove the line at y=0
-        ),
-        margin=dict(l=50, r=50, t=80, b=50),  # Adjust margins for balance
-        height=600,  # Set a comfortable height for the plot
-    )
-
-    # Add interactive hover template
-    fig.update_traces(
-        hovertemplate="<b>Global Rank</b>: %{x}<br><b>Number of Players</b>: %{y}<extra></extra>"
-    )
-
-    # Display the chart in Streamlit
-    st.plotly_chart(fig, use_container_width=True)
-    st.markdown("---")
+        st.markdown("---")
+
+    with profiling.section("dashboard.overview.favourite_teams"):
+        fig = overview_figure(figures, "favourite_teams", data)
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown("---")
+
+    with profiling.section("dashboard.overview.team_boxes"):
+        fig = overview_figure(figures, "team_points_boxes", data)
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown("---")
+
+    with profiling.section("dashboard.overview.years_boxes"):
+        fig = overview_figure(figures, "years_active_boxes", data)
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown("---")
+    with profiling.section("dashboard.overview.global_ranks"):
+        fig = overview_figure(figures, "global_rank_histogram", data)
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown("---")
    
-    #Global Distribution of FPL Players
-        # Load the data
-    # Load the data from the provided CSV file
-    file_path = "fpl_country_data_with_country_codes.csv"  # Update with your correct file path
-    country_data = pd.read_csv(file_path)
-    top_10_countries = country_data.nlargest(10, "National League Player Count")
-   # Create a horizontal bar chart to show the number of players in each country
-    fig = px.bar(
-        top_10_countries,
-        x="National League Player Count",  # Number of players
-        y="Country",  # Country names
-        title="Top 10 Countries by Number of FPL Players",
-        labels={"National League Player Count": "Number of Players", "Country": "Country"},
-        template="plotly_dark",  # Dark theme for aesthetics
-        color="National League Player Count",  # Color bars based on player count
-        color_continuous_scale="Viridis",  # Color scale from yellow to red
-    )
-
-    # Customize the layout
-    fig.update_layout(
-        title=dict(
-            text="Top 10 Countries by Number of FPL Players",
-            # x=0.5,  # Center the title
-            font=dict(size=20)
-        ),
-        xaxis=dict(
-            title="Number of Players",
-            tickformat=",",  # Format numbers with commas for readability
-        ),
-        yaxis=dict(
-            title="",
-            categoryorder="total ascending",  # Sort by the number of players in ascending order
-        ),
-        height=800,  # Adjust the height for a better view
-        margin=dict(l=150, r=50, t=50, b=50),  # Adjust margins for proper spacing
-    )
-
-    # Display the chart in Streamlit
-    st.plotly_chart(fig, use_container_width=True)
-
-with tab2:
-    # Correct mapping for favorite teams
-    team_names = {
-        "Arsenal": "Arsenal",
-        "Aston Villa": "Aston Villa",
-        "Bournemouth": "Bournemouth",
-        "Brentford": "Brentford",
-        "Brighton & Hove Albion": "Brighton & Hove Albion",
-        "Chelsea": "Chelsea",
-        "Crystal Palace": "Crystal Palace",
-        "Everton": "Everton",
-        "Fulham": "Fulham",
-        "Ipswich Town": "Ipswich Town",
-        "Leicester City": "Leicester City",
-        "Liverpool": "Liverpool",
-        "Manchester City": "Manchester City",
-        "Manchester United": "Manchester United",
-        "Newcastle United": "Newcastle United",
-        "Nottingham Forest": "Nottingham Forest",
-        "Southampton": "Southampton",
-        "Tottenham Hotspur": "Tottenham Hotspur",
-        "West Ham United": "West Ham United",
-        "Wolverhampton Wanderers": "Wolverhampton Wanderers",
-    }
-
-    # Sort the data by total points to show the leaderboard
-    leaderboard_data = df.sort_values(by="total", ascending=False)
-    st.subheader("Leaderboard by Total Points")
-    # Add a slider for the number of players to display
-    num_players = st.slider("Select number of players to display", min_value=10, max_value=100, value=20)
-
-    # Select the top N players based on the slider value
-    leaderboard_display = leaderboard_data.head(num_players)
-
-    # Map the favorite team codes to team names using the dictionary
-    leaderboard_display["Favorite Team"] = leaderboard_display["favourite_team_name"].map(team_names)
-
-    # Remove the index column from the table
-    leaderboard_display.reset_index(drop=True, inplace=True)
-
-    # Rename the columns for better readability
-    leaderboard_display.rename(columns={
-        "rank": "Position",
-        "entry_name": "Team Name",
-        "event_total": "GW 20 Points",
-        "total": "Total Points",
-        "last_rank": "Last Rank",
-        "summary_overall_rank": "Global Rank"
-    }, inplace=True)
-
-    # Show the leaderboard table with selected columns (including the favorite team names)
+    with profiling.section("dashboard.overview.countries"):
+        # The country chart does not depend on the data version, but is exported with it
+        fig = overview_figure(figures, "top_countries", load_country_data)
+        st.plotly_chart(fig, use_container_width=True)
+
+# Widget-driven blocks are fragments, so an interaction reruns only its own block
+@st.fragment
+def render_leaderboard_total(data):
+    gw = gameweek_label(data)
+    team_names = team_names_for(data)
+    with profiling.section("dashboard.leaderboards.total"):
+        st.subheader("Leaderboard by Total Points")
+        # Add a slider for the number of players to display
+        num_players = st.slider("Select number of players to display", min_value=10, max_value=100, value=20)
+
+        # Select the top N players from the precomputed leaderboard
+        leaderboard_display = data["top_total"].head(num_players).copy()
+
+        # Map the favorite team codes to team names using the dictionary
+        leaderboard_display["Favorite Team"] = leaderboard_display["favourite_team_name"].map(team_names)
+
+        # Remove the index column from the table
+        leaderboard_display.reset_index(drop=True, inplace=True)
+
+        # Rename the columns for better readability
+        leaderboard_display.rename(columns={
+            "rank": "Position",
+            "entry_name": "Team Name",
+            "event_total": f"{gw} Points",
+            "total": "Total Points",
+            "last_rank": "Last Rank",
+            "summary_overall_rank": "Global Rank"
+        }, inplace=True)
+
+        # Show the leaderboard table with selected columns (including the favorite team names)
     
-    st.dataframe(
-        leaderboard_display[["Position", "Team Name", "GW 20 Points", "Total Points", "Last Rank", "Global Rank", "Favorite Team"]],
-        width=1000,  # Adjust width for better table readability
-    )
-
-    st.markdown("---")
-
-    #GW 20 Leaderboard
-
-    # Sort the data by GW 20 points (event_total)
-    leaderboard_data_gw20 = df.sort_values(by="event_total", ascending=False)
-    st.subheader("Leaderboard by GW 20 Points")
-    # Add a slider for the number of players to display
-    num_players_gw20 = st.slider("Select number of players to display for GW 20", min_value=10, max_value=100, value=20)
-
-    # Select the top N players based on the slider value
-    leaderboard_display_gw20 = leaderboard_data_gw20.head(num_players_gw20)
-
-    # Map the favorite team codes to team names using the dictionary
-    leaderboard_display_gw20["Favorite Team"] = leaderboard_display_gw20["favourite_team_name"].map(team_names)
-
-    # Remove the index column from the table
-    leaderboard_display_gw20.reset_index(drop=True, inplace=True)
-
-    # Rename the columns for better readability
-    leaderboard_display_gw20.rename(columns={
-        "rank": "Position",
-        "entry_name": "Team Name",
-        "event_total": "GW 20 Points",
-        "total": "Total Points",
-        "last_rank": "Last Rank"
-    }, inplace=True)
-
-    # Show the leaderboard table with selected columns (including the favorite team names)
+        st.dataframe(
+            leaderboard_display[["Position", "Team Name", f"{gw} Points", "Total Points", "Last Rank", "Global Rank", "Favorite Team"]],
+            width=1000,  # Adjust width for better table readability
+        )
+
+        st.markdown("---")
+
+@st.fragment
+def render_leaderboard_gameweek(data):
+    gw = gameweek_label(data)
+    team_names = team_names_for(data)
+    with profiling.section("dashboard.leaderboards.gameweek"):
+        #GW 20 Leaderboard
+
+        st.subheader(f"Leaderboard by {gw} Points")
+        # Add a slider for the number of players to display
+        num_players_gw20 = st.slider(f"Select number of players to display for {gw}", min_value=10, max_value=100, value=20)
+
+        # Select the top N players by GW 20 points (event_total) from the precomputed leaderboard
+        leaderboard_display_gw20 = data["top_event"].head(num_players_gw20).copy()
+
+        # Map the favorite team codes to team names using the dictionary
+        leaderboard_display_gw20["Favorite Team"] = leaderboard_display_gw20["favourite_team_name"].map(team_names)
+
+        # Remove the index column from the table
+        leaderboard_display_gw20.reset_index(drop=True, inplace=True)
+
+        # Rename the columns for better readability
+        leaderboard_display_gw20.rename(columns={
+            "rank": "Position",
+            "entry_name": "Team Name",
+            "event_total": f"{gw} Points",
+            "total": "Total Points",
+            "last_rank": "Last Rank"
+        }, inplace=True)
+
+        # Show the leaderboard table with selected columns (including the favorite team names)
     
-    st.dataframe(
-        leaderboard_display_gw20[["Position", "Team Name", "GW 20 Points", "Total Points", "Last Rank", "Favorite Team"]],
-        width=1000,  # Adjust width for better table readability
-    )
-    st.markdown("---")
-   
-    #Leaderboards by Favourite Teams
-    # Sort the data by total points to show the leaderboard
-    leaderboard_data = df.sort_values(by="total", ascending=False)
-    st.subheader("Leaderboard by Favourite Teams")
-
-    # Add a dropdown to select a team
-    team_selection = st.selectbox("Select a Team", list(team_names.values()))
-
-    # Filter the leaderboard data by the selected team
-    filtered_data = leaderboard_data[leaderboard_data["favourite_team_name"] == team_selection]
-
-    # Add a slider for the number of players to display
-    num_players = st.slider(f"Select number of top players for {team_selection}", min_value=10, max_value=100, value=20)
-
-    # Select the top N players based on the slider value
-    leaderboard_display = filtered_data.head(num_players)
-
-    # Map the favorite team codes to team names using the dictionary
-    leaderboard_display["Favorite Team"] = leaderboard_display["favourite_team_name"].map(team_names)
-
-    # Remove the original 'favourite_team_name' column to avoid duplication
-    leaderboard_display.drop(columns=["favourite_team_name"], inplace=True)
-
-    # Remove the index column from the table
-    leaderboard_display.reset_index(drop=True, inplace=True)
-
-    # Rename the columns for better readability
-    leaderboard_display.rename(columns={
-        "rank": "Position",
-        "entry_name": "Team Name",
-        "event_total": "GW 20 Points",
-        "total": "Total Points",
-        "last_rank": "Last Rank",
-    }, inplace=True)
-
-    # Show the leaderboard table with selected columns (including the favorite team names)
-    st.subheader(f"Top Players for {team_selection}")
-    st.dataframe(
-        leaderboard_display[["Position", "Team Name", "GW 20 Points", "Total Points", "Last Rank", "Favorite Team"]],
-        width=1000,  # Adjust width for better table readability
-    )
-
-
-with tab3:
-
-   # Add a title for the search tab
-    st.subheader("Search for Player by FPL ID")
-
-    # Create an input box for FPL ID (entry)
-    fpl_id = st.text_input("Enter the FPL ID:").strip()
-
-    # Search the dataframe when the FPL ID is entered
-    if fpl_id:
-        # Ensure the entered value is an integer, as FPL ID (entry) should be numeric
-        try:
-            fpl_id = int(fpl_id)  # Convert to integer
+        st.dataframe(
+            leaderboard_display_gw20[["Position", "Team Name", f"{gw} Points", "Total Points", "Last Rank", "Favorite Team"]],
+            width=1000,  # Adjust width for better table readability
+        )
+        st.markdown("---")
+
+@st.fragment
+def render_leaderboard_by_team(data):
+    gw = gameweek_label(data)
+    team_names = team_names_for(data)
+    with profiling.section("dashboard.leaderboards.by_team"):
+        #Leaderboards by Favourite Teams
+        st.subheader("Leaderboard by Favourite Teams")
+
+        # Add a dropdown to select a team
+        team_selection = st.selectbox("Select a Team", list(team_names.values()))
+
+        # Add a slider for the number of players to display
+        num_players = st.slider(f"Select number of top players for {team_selection}", min_value=10, max_value=100, value=20)
+
+        # Select the top N players for the selected team from the precomputed leaderboards
+        leaderboard_display = data["top_by_team"].get(team_selection, data["top_total"].iloc[0:0]).head(num_players).copy()
+
+        # Map the favorite team codes to team names using the dictionary
+        leaderboard_display["Favorite Team"] = leaderboard_display["favourite_team_name"].map(team_names)
+
+        # Remove the original 'favourite_team_name' column to avoid duplication
+        leaderboard_display.drop(columns=["favourite_team_name"], inplace=True)
+
+        # Remove the index column from the table
+        leaderboard_display.reset_index(drop=True, inplace=True)
+
+        # Rename the columns for better readability
+        leaderboard_display.rename(columns={
+            "rank": "Position",
+            "entry_name": "Team Name",
+            "event_total": f"{gw} Points",
+            "total": "Total Points",
+            "last_rank": "Last Rank",
+        }, inplace=True)
+
+        # Show the leaderboard table with selected columns (including the favorite team names)
+        st.subheader(f"Top Players for {team_selection}")
+        st.dataframe(
+            leaderboard_display[["Position", "Team Name", f"{gw} Points", "Total Points", "Last Rank", "Favorite Team"]],
+            width=1000,  # Adjust width for better table readability
+        )
+
+@st.fragment
+def render_search(data):
+    gw = gameweek_label(data)
+    with profiling.section("dashboard.search"):
+       # Add a title for the search tab
+        st.subheader("Search for Player by FPL ID or Name")
+
+        # Create an input box for FPL ID (entry), team name or manager name
+        search_text = st.text_input("Enter an FPL ID, team name or manager name:").strip()
+
+        # Names are matched through the prebuilt prefix/trigram index
+        fpl_id = search_text
+        if search_text and not search_text.isdigit():
+            fpl_id = None
+            matches = query_engine.search_names(data["db_file"], search_text)
+            if matches.empty:
+                st.warning(f"No teams or managers found matching \"{search_text}\".")
+            else:
+                match_labels = [
+                    f"{row.entry_name} ({row.player_name}) - ID {row.entry}"
+                    for row in matches.itertuples(index=False)
+                ]
+                selected_match = st.selectbox("Matching teams", range(len(matches)), format_func=lambda i: match_labels[i])
+                fpl_id = str(matches["entry"].iloc[selected_match])
+
+        # Search the dataframe when the FPL ID is entered
+        if fpl_id:
+            # Ensure the entered value is an integer, as FPL ID (entry) should be numeric
+            try:
+                fpl_id = int(fpl_id)  # Convert to integer
             
-            # Filter the dataframe based on the FPL ID
-            result = df[df["entry"] == fpl_id]
+                # Look up the FPL ID through the memory-mapped entry index (or the store's, for older versions)
+                if data.get("arrow_file"):
+                    result = arrow_store.lookup_entry(data["arrow_file"], fpl_id)
+                else:
+                    result = query_engine.lookup_entry(data["db_file"], fpl_id)
             
-            if result.empty:
-                st.warning(f"No player found with FPL ID {fpl_id}.")
-            else:
-                # Extract the team name from the result
-                team_name = result["entry_name"].values[0]
+                if result.empty:
+                    st.warning(f"No player found with FPL ID {fpl_id}.")
+                else:
+                    # Extract the team name from the result
+                    team_name = result["entry_name"].values[0]
                 
-                # Clean the DataFrame to show necessary details
-                player_data = result[['entry_name', 'rank', 'total', 'event_total', 'years_active', 'favourite_team_name', 'last_rank', 'summary_overall_rank']]
+                    # Clean the DataFrame to show necessary details
+                    player_data = result[['entry_name', 'rank', 'total', 'event_total', 'years_active', 'favourite_team_name', 'last_rank', 'summary_overall_rank']]
                 
-                # Map favourite team codes to team names
-                team_names = {
-                    "Arsenal": "Arsenal", "Aston Villa": "Aston Villa", "Bournemouth": "Bournemouth",
-                    "Brentford": "Brentford", "Brighton & Hove Albion": "Brighton & Hove Albion", "Chelsea": "Chelsea",
-                    "Crystal Palace": "Crystal Palace", "Everton": "Everton", "Fulham": "Fulham", "Ipswich Town": "Ipswich Town",
-                    "Leicester City": "Leicester City", "Liverpool": "Liverpool", "Manchester City": "Manchester City",
-                    "Manchester United": "Manchester United", "Newcastle United": "Newcastle United", "Nottingham Forest": "Nottingham Forest",
-                    "Southampton": "Southampton", "Tottenham Hotspur": "Tottenham Hotspur", "West Ham United": "West Ham United",
-                    "Wolverhampton Wanderers": "Wolverhampton Wanderers"
-                }
+                    # Map favourite team codes to team names
+                    team_names = team_names_for(data)
 
-                # Map favourite team codes to team names
-                player_data["Favorite Team"] = player_data["favourite_team_name"].map(team_names)
+                    # Map favourite team codes to team names
+                    player_data["Favorite Team"] = player_data["favourite_team_name"].map(team_names)
                 
-                # Remove the duplicate 'favourite_team_name' column
-                player_data.drop(columns=["favourite_team_name"], inplace=True)
-
-                # Rename columns for readability
-                player_data.rename(columns={
-                    'entry_name': 'Team Name', 'rank': 'Position', 'total': 'Total Points', 
-                    'event_total': 'GW 20 Points', 'years_active': 'Years Active', 'last_rank': 'Last Rank', 'summary_overall_rank': 'Overall Rank'
-                }, inplace=True)
-
-                # Show the player information with a more aesthetic and clean layout
-                st.write(f"Player Information for {team_name}")
-
-                # Display the data in a table format with improved styling
-                st.markdown("""
-                    <style>
-                        .stDataFrame > div {
-                            margin-top: 0;
-                        }
-                        .stDataFrame table {
-                            width: 100%;
-                            border-collapse: collapse;
-                        }
-                        .stDataFrame th, .stDataFrame td {
-                            padding: 10px;
-                            text-align: left;
-                            border-bottom: 1px solid #ddd;
-                        }
-                        .stDataFrame th {
-                            background-color: #222222;
-                            color: white;
-                        }
-                        .stDataFrame td {
-                            color: white;
-                        }
-                        .stDataFrame tr:hover {
-                            background-color: #444444;
-                        }
-                    </style>
-                """, unsafe_allow_html=True)
-
-                st.dataframe(
-                    player_data[["Position", "Overall Rank", "Team Name", "GW 20 Points", "Total Points", "Last Rank", "Years Active", "Favorite Team"]],
-                    width=1000,  # Adjust width for better table readability
-                )
+                    # Remove the duplicate 'favourite_team_name' column
+                    player_data.drop(columns=["favourite_team_name"], inplace=True)
+
+                    # Rename columns for readability
+                    player_data.rename(columns={
+                        'entry_name': 'Team Name', 'rank': 'Position', 'total': 'Total Points', 
+                        'event_total': f'{gw} Points', 'years_active': 'Years Active', 'last_rank': 'Last Rank', 'summary_overall_rank': 'Overall Rank'
+                    }, inplace=True)
+
+                    # Show the player information with a more aesthetic and clean layout
+                    st.write(f"Player Information for {team_name}")
+
+                    # Display the data in a table format with improved styling
+                    st.markdown("""
+                        <style>
+                            .stDataFrame > div {
+                                margin-top: 0;
+                            }
+                            .stDataFrame table {
+                                width: 100%;
+                                border-collapse: collapse;
+                            }
+                            .stDataFrame th, .stDataFrame td {
+                                padding: 10px;
+                                text-align: left;
+                                border-bottom: 1px solid #ddd;
+                            }
+                            .stDataFrame th {
+                                background-color: #222222;
+                                color: white;
+                            }
+                            .stDataFrame td {
+                                color: white;
+                            }
+                            .stDataFrame tr:hover {
+                                background-color: #444444;
+                            }
+                        </style>
+                    """, unsafe_allow_html=True)
+
+                    st.dataframe(
+                        player_data[["Position", "Overall Rank", "Team Name", f"{gw} Points", "Total Points", "Last Rank", "Years Active", "Favorite Team"]],
+                        width=1000,  # Adjust width for better table readability
+                    )
+
+                    # The full season history is fetched from the FPL API only when asked for
+                    if st.toggle("Show season history", key="show_history"):
+                        render_history(fpl_id)
                 
-        except ValueError:
-            st.error("Please enter a valid FPL ID (numeric only).")
\ No newline at end of file
+            except ValueError:
+                st.error("Please enter a valid FPL ID (numeric only).")
+
+# Season history of one manager, from the shared single-flight cache
+def render_history(fpl_id):
+    import manager_history
+    future = manager_history.default_cache().request(fpl_id)
+    if not future.done():
+        wait_for_history(fpl_id)
+        return
+    if future.exception():
+        st.warning(f"Could not load the season history for FPL ID {fpl_id}. Try again shortly.")
+        return
+
+    gameweeks, chips, past = manager_history.history_frames(future.result())
+    if gameweeks.empty:
+        st.info("No gameweeks played this season.")
+    else:
+        import charts
+        st.plotly_chart(charts.rank_history(gameweeks), use_container_width=True)
+        st.dataframe(
+            gameweeks.rename(columns={
+                "event": "GW", "points": "Points", "total_points": "Total Points", "rank": "GW Rank",
+                "overall_rank": "Overall Rank", "event_transfers": "Transfers", "event_transfers_cost": "Hit",
+                "points_on_bench": "Bench Points",
+            })[["GW", "Points", "Total Points", "GW Rank", "Overall Rank", "Transfers", "Hit", "Bench Points"]],
+            hide_index=True,
+            width=1000,
+        )
+    if not chips.empty:
+        st.write("Chips played")
+        st.dataframe(chips.rename(columns={"name": "Chip", "event": "GW"})[["Chip", "GW"]], hide_index=True)
+    if not past.empty:
+        st.write("Past seasons")
+        st.dataframe(past.rename(columns={"season_name": "Season", "total_points": "Total Points", "rank": "Overall Rank"}), hide_index=True)
+
+# Polls on its own while the history is fetched, so the rest of the page renders without waiting
+@st.fragment(run_every=HISTORY_POLL_INTERVAL)
+def wait_for_history(fpl_id):
+    import manager_history
+    if manager_history.default_cache().request(fpl_id).done():
+        st.rerun()
+    st.info("Loading season history...")
+
+# Checks the manifest on its own; the page reruns only once a new data version has been swapped in
+@st.fragment(run_every=RELOAD_INTERVAL)
+def watch_data_version(rendered_version):
+    holder = get_snapshot_holder()
+    holder.check_for_update()
+    if holder.current()["version"] != rendered_version:
+        st.rerun()
+
+@st.fragment
+def render_movers(data):
+    team_names = team_names_for(data)
+    with profiling.section("dashboard.movers"):
+        st.subheader("Biggest Rank Movers")
+
+        # Movers are precomputed per data version, so this only filters a small index table
+        movers = data["movers"]
+        scope_options = ["Overall"] + [team for team in team_names.values() if team in set(movers["scope"])]
+        movers_scope = st.selectbox("Select a scope", scope_options)
+        movers_direction = st.radio("Show", ["Climbers", "Fallers"], horizontal=True)
+        num_movers = st.slider("Select number of movers to display", min_value=10, max_value=100, value=20)
+
+        movers_display = movers[
+            (movers["direction"] == movers_direction.lower()) & (movers["scope"] == movers_scope)
+        ].head(num_movers).copy()
+
+        # Fallers have negative deltas; show the size of the drop
+        movers_display["rank_change"] = movers_display["rank_change"].abs()
+        movers_display.reset_index(drop=True, inplace=True)
+        change_label = "Places Climbed" if movers_direction == "Climbers" else "Places Dropped"
+
+        # Rename the columns for better readability
+        movers_display.rename(columns={
+            "entry_name": "Team Name",
+            "rank": "Position",
+            "last_rank": "Last Rank",
+            "rank_change": change_label,
+            "total": "Total Points",
+        }, inplace=True)
+
+        st.dataframe(
+            movers_display[["Team Name", "Position", "Last Rank", change_label, "Total Points"]],
+            width=1000,  # Adjust width for better table readability
+        )
+
+with profiling.section("dashboard.load_snapshot"):
+    holder = get_snapshot_holder()
+    holder.check_for_update()
+    data = holder.current()  # One snapshot per rerun, so every block sees the same version
+watch_data_version(data["version"])
+
+# Title
+st.title("FPL Kenya")
+
+# Only the selected view is computed (st.tabs would run every tab on each rerun)
+view = st.radio("View", VIEWS, horizontal=True, label_visibility="collapsed", key="view")
+
+if view == "Overview":
+    render_overview(data)
+elif view == "Leaderboards":
+    render_leaderboard_total(data)
+    render_leaderboard_gameweek(data)
+    render_leaderboard_by_team(data)
+elif view == "Search":
+    render_search(data)
+elif view == "Movers":
+    render_movers(data)
+
+# Write the profiling report after every rerun (no-op unless FPL_PROFILE is set)
+profiling.write_report()
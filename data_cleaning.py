@@ -1,47 +1,90 @@
 import pandas as pd
 import numpy as np
+import os
+import sys
+import argparse
+import requests
+import data_version
+import dataset_catalog
+import snapshot_export
+import profiling
+
+parser = argparse.ArgumentParser(description="Clean league players and publish a data version.")
+parser.add_argument("--season", help="Season of the snapshot, e.g. 2024-25 (default: current FPL season)")
+parser.add_argument("--gameweek", type=int, help="Gameweek of the snapshot (default: current FPL gameweek)")
+parser.add_argument("--input", default="league_players.csv", help="Enriched league players CSV to clean")
+args = parser.parse_args()
 
 # Load the data
-file_name = "league_players.csv"
+file_name = args.input
 output_file = "cleaned_league_players.csv"
 
+# Resolve the season and gameweek this snapshot belongs to; bootstrap-static is only
+# needed when they are not both given or the season's team list is not known yet
+season, gameweek, api_teams = None, None, None
+if not (args.season and args.gameweek and dataset_catalog.season_teams(args.season, default=None)):
+    try:
+        print("Fetching current season and gameweek...")
+        season, gameweek, api_teams = dataset_catalog.fetch_current_gameweek()
+    except requests.RequestException as e:
+        # Offline (e.g. cleaning after an archive replay): fall back to the catalog's current entry
+        current = dataset_catalog.load_catalog().get("current") or {}
+        season, gameweek = current.get("season"), current.get("gameweek")
+        print(f"Could not fetch the current season ({e}); using the catalog's current entry: {season}, gameweek {gameweek}")
+api_season = season
+season, gameweek = args.season or season, args.gameweek or gameweek
+if season is None:
+    sys.exit("No season given and the current one could not be determined; pass --season.")
+
+teams = dataset_catalog.season_teams(season, default=None)
+if teams is None:
+    if api_teams and season == api_season:
+        teams = api_teams
+    else:
+        sys.exit(f"No team list known for season {season}; run once online so it can be fetched from bootstrap-static.")
+print(f"Season {season}, gameweek {gameweek or 'not started'}")
+
 # Load the CSV file
-print("Loading data...")
-df = pd.read_csv(file_name)
+with profiling.section("cleaning.load"):
+    print("Loading data...")
+    df = pd.read_csv(file_name)
 
-# Display initial summary
-print("Initial dataset info:")
-print(df.info())
-print(df.describe())
+    # Display initial summary
+    print("Initial dataset info:")
+    print(df.info())
+    print(df.describe())
 
 # Step 1: Handle Missing Values
-print("Handling missing values...")
-# Fill missing numerical values with 0 or mean (depending on context)
-numerical_columns = ["event_total", "rank", "last_rank", "total", "years_active", "summary_overall_rank"]
-df[numerical_columns] = df[numerical_columns].fillna(0)
+with profiling.section("cleaning.missing_values"):
+    print("Handling missing values...")
+    # Fill missing numerical values with 0 or mean (depending on context)
+    numerical_columns = ["event_total", "rank", "last_rank", "total", "years_active", "summary_overall_rank"]
+    df[numerical_columns] = df[numerical_columns].fillna(0)
 
-# Fill missing string values with "Unknown"
-string_columns = ["player_name", "entry_name", "joined_time", "favourite_team"]
-df[string_columns] = df[string_columns].fillna("Unknown")
+    # Fill missing string values with "Unknown"
+    string_columns = ["player_name", "entry_name", "joined_time", "favourite_team"]
+    df[string_columns] = df[string_columns].fillna("Unknown")
 
 # Step 2: Correct Data Types
-print("Correcting data types...")
-# Convert joined_time to datetime
-df["joined_time"] = pd.to_datetime(df["joined_time"], errors="coerce")
+with profiling.section("cleaning.data_types"):
+    print("Correcting data types...")
+    # Convert joined_time to datetime
+    df["joined_time"] = pd.to_datetime(df["joined_time"], errors="coerce")
 
-# Convert categorical data to category type
-categorical_columns = ["player_name", "entry_name", "favourite_team", "has_played"]
-for col in categorical_columns:
-    df[col] = df[col].astype("category")
+    # Convert categorical data to category type
+    categorical_columns = ["player_name", "entry_name", "favourite_team", "has_played"]
+    for col in categorical_columns:
+        df[col] = df[col].astype("category")
 
-# Convert numerical columns to appropriate types
-integer_columns = ["rank", "last_rank", "years_active", "summary_overall_rank", "event_total", "total", "started_event", "player_id", "entry"]
-for col in integer_columns:
-    df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
+    # Convert numerical columns to appropriate types
+    integer_columns = ["rank", "last_rank", "years_active", "summary_overall_rank", "event_total", "total", "started_event", "player_id", "entry"]
+    for col in integer_columns:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
 
 # Step 3: Handle Duplicates
-print("Removing duplicates...")
-df = df.drop_duplicates(subset="player_id")
+with profiling.section("cleaning.duplicates"):
+    print("Removing duplicates...")
+    df = df.drop_duplicates(subset="player_id")
 
 # # Step 4: Standardize Text
 # print("Standardizing text fields...")
@@ -56,13 +99,38 @@ df = df.drop_duplicates(subset="player_id")
 # df = df[df["rank"] > 0]
 
 # Step 6: Validate Data
-print("Validating data...")
-# Check for missing or invalid datetime values
-invalid_dates = df["joined_time"].isnull().sum()
-print(f"Invalid dates: {invalid_dates}")
+with profiling.section("cleaning.validate"):
+    print("Validating data...")
+    # Check for missing or invalid datetime values
+    invalid_dates = df["joined_time"].isnull().sum()
+    print(f"Invalid dates: {invalid_dates}")
 
 # Step 7: Save Cleaned Data
-print("Saving cleaned data...")
-df.to_csv(output_file, index=False)
+with profiling.section("cleaning.save"):
+    print("Saving cleaned data...")
+    # Write to a temporary file first so readers never see a half-written CSV
+    df.to_csv(f"{output_file}.tmp", index=False)
+    os.replace(f"{output_file}.tmp", output_file)
+
+    print("Data cleaning complete. Cleaned file saved as:", output_file)
+
+# Step 8: Write the season/gameweek partition of the historical dataset
+with profiling.section("cleaning.partition"):
+    if gameweek:
+        print("Writing dataset partition...")
+        partition = dataset_catalog.write_partition(df, season, gameweek, teams)
+        print("Partition saved as:", partition)
+    else:
+        # Preseason: no gameweek has started, so there is no partition to file this snapshot under
+        print(f"No current gameweek in season {season}; skipping the dataset partition (pass --gameweek to write one).")
+
+# Step 9: Publish a new data version for the dashboard to swap in
+with profiling.section("cleaning.publish"):
+    print("Publishing data version...")
+    manifest = data_version.publish_version(output_file, season, gameweek, teams)
+    print("Published data version:", manifest["version"])
 
-print("Data cleaning complete. Cleaned file saved as:", output_file)
+# Step 10: Pre-render the static dashboard charts and leaderboards for the new version
+with profiling.section("cleaning.export"):
+    print("Exporting static dashboard snapshot...")
+    print("Exported to:", snapshot_export.export_version(manifest))
@@ -0,0 +1,238 @@
+import threading
+import shutil
+import logging
+import json
+import time
+import os
+import query_engine
+import arrow_store
+import profiling
+
+# Constants
+MANIFEST_FILE = "data_manifest.json"
+VERSIONS_DIR = "data_versions"
+KEEP_VERSIONS = 3  # Older versions are pruned after a publish
+PRUNE_GRACE = 600  # Seconds a superseded version is kept, so processes still serving it can swap first
+LEADERBOARD_SIZE = 100  # Largest leaderboard the dashboard can show
+
+_default_holder = None
+_default_lock = threading.Lock()
+
+
+def write_json_atomic(path, data):
+    """
+    Write JSON to a temporary file and move it into place.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(manifest_path=MANIFEST_FILE):
+    """
+    Return the current data-version manifest, or None if nothing is published.
+    """
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def current_manifest(manifest_path=MANIFEST_FILE):
+    """
+    Return the published manifest, falling back to the unversioned store.
+    """
+    manifest = read_manifest(manifest_path)
+    if manifest is None:
+        manifest = {"version": "unversioned", "db_file": query_engine.DB_FILE}
+    return manifest
+
+
+def prune_versions(keep, versions_dir=VERSIONS_DIR, grace=PRUNE_GRACE):
+    """
+    Remove all but the newest `keep` published stores, with their Arrow
+    datasets and exports.
+
+    A version is only removed once the version after it has been published
+    for `grace` seconds: dashboards and the API poll the manifest about once
+    a minute and keep querying their current store until they swap, so
+    frequent publishes must not delete it from under them. Versions kept
+    back are pruned by a later publish.
+    """
+    stores = sorted(name for name in os.listdir(versions_dir) if name.endswith(".db"))
+    now = time.time()
+    for i, name in enumerate(stores[:-keep]):
+        superseded_at = os.path.getmtime(os.path.join(versions_dir, stores[i + 1]))
+        if now - superseded_at < grace:
+            continue
+        stem = os.path.splitext(name)[0]
+        for artifact in os.listdir(versions_dir):
+            if os.path.splitext(artifact)[0] != stem and not artifact.startswith(f"{stem}-"):
+                continue
+            artifact_path = os.path.join(versions_dir, artifact)
+            if os.path.isdir(artifact_path):
+                shutil.rmtree(artifact_path)
+            else:
+                os.remove(artifact_path)  # Processes still mapping an Arrow file keep their pages until they let go
+        logging.info(f"Pruned old data version {name}")
+
+
+def new_version_id(versions_dir=VERSIONS_DIR):
+    """
+    Return a version ID (timestamp to the microsecond) that no store in `versions_dir` uses.
+
+    Publishing into an existing version's files would change them under
+    readers that never swap, since the version string would not change.
+    """
+    while True:
+        now = time.time()
+        version = time.strftime("%Y%m%dT%H%M%S", time.localtime(now)) + f"{int(now % 1 * 1_000_000):06d}"
+        if not os.path.exists(os.path.join(versions_dir, f"league-{version}.db")):
+            return version
+
+
+def publish_version(csv_path, season=None, gameweek=None, teams=None, manifest_path=MANIFEST_FILE, versions_dir=VERSIONS_DIR):
+    """
+    Build a new versioned store from the cleaned CSV and publish it.
+
+    The season, gameweek and team list are recorded in the manifest so the
+    dashboard can label and filter the data it shows.
+
+    Alongside the SQLite store, the dataset is written as a memory-mapped
+    Arrow file holding the leaderboard and lookup indexes, which every
+    dashboard process shares through the page cache.
+
+    The store is complete before the manifest is swapped, so readers only
+    ever see fully built versions.
+    """
+    os.makedirs(versions_dir, exist_ok=True)
+    version = new_version_id(versions_dir)
+    db_path = os.path.join(versions_dir, f"league-{version}.db")
+    arrow_path = os.path.join(versions_dir, f"league-{version}{arrow_store.ARROW_SUFFIX}")
+    query_engine.build_store(csv_path, db_path, teams)
+    arrow_store.build_dataset(csv_path, arrow_path, teams)
+
+    manifest = {
+        "version": version,
+        "db_file": db_path,
+        "arrow_file": arrow_path,
+        "source": csv_path,
+        "season": season,
+        "gameweek": gameweek,
+        "teams": teams or query_engine.EPL_TEAMS,
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    write_json_atomic(manifest_path, manifest)
+    logging.info(f"Published data version {version}")
+
+    prune_versions(KEEP_VERSIONS, versions_dir)
+    return manifest
+
+
+@profiling.profiled("snapshot.load")
+def load_snapshot(manifest):
+    """
+    Run every derived query for a data version.
+
+    Returns a dict holding the version's store paths and the precomputed
+    Overview aggregates, leaderboards and rank movers. Leaderboards are
+    sliced from the memory-mapped Arrow dataset when the version has one.
+    """
+    db_file = manifest["db_file"]
+    arrow_file = manifest.get("arrow_file")
+    if arrow_file and os.path.exists(arrow_file):
+        top_n, leaderboard_source = arrow_store.top_n, arrow_file
+    else:
+        top_n, leaderboard_source, arrow_file = query_engine.top_n, db_file, None
+    teams = query_engine.team_counts(db_file)
+    return {
+        "version": manifest["version"],
+        "db_file": db_file,
+        "arrow_file": arrow_file,
+        "season": manifest.get("season"),
+        "gameweek": manifest.get("gameweek"),
+        "teams": manifest.get("teams") or query_engine.EPL_TEAMS,
+        "overview": query_engine.overview_stats(db_file),
+        "total_bins": query_engine.histogram(db_file, "total"),
+        "rank_bins": query_engine.histogram(db_file, "summary_overall_rank", min_value=0),
+        "signups": query_engine.signups_by_date(db_file),
+        "team_counts": teams,
+        "team_boxes": query_engine.box_stats(db_file, "favourite_team_name"),
+        "years_boxes": query_engine.box_stats(db_file, "years_active"),
+        "top_total": top_n(leaderboard_source, "total", LEADERBOARD_SIZE),
+        "top_event": top_n(leaderboard_source, "event_total", LEADERBOARD_SIZE),
+        "top_by_team": {
+            team: top_n(leaderboard_source, "total", LEADERBOARD_SIZE, team)
+            for team in teams["Team"]
+        },
+        "movers": query_engine.all_rank_movers(db_file),
+    }
+
+
+class SnapshotHolder:
+    """
+    Hold the live snapshot and swap in new data versions in the background.
+    """
+
+    def __init__(self, manifest_path=MANIFEST_FILE, loader=load_snapshot):
+        self.manifest_path = manifest_path
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.loading_version = None
+
+    def current(self):
+        """
+        Return the live snapshot, loading it on first use.
+        """
+        if self.snapshot is None:
+            with self.lock:
+                if self.snapshot is None:
+                    self.snapshot = self.loader(current_manifest(self.manifest_path))
+        return self.snapshot
+
+    def check_for_update(self):
+        """
+        Start a background load if a newer version has been published.
+        """
+        manifest = read_manifest(self.manifest_path)
+        if manifest is None or self.snapshot is None:
+            return False
+        with self.lock:
+            if manifest["version"] in (self.snapshot["version"], self.loading_version):
+                return False
+            self.loading_version = manifest["version"]
+        threading.Thread(target=self._load, args=(manifest,), daemon=True).start()
+        return True
+
+    def _load(self, manifest):
+        try:
+            snapshot = self.loader(manifest)
+            with self.lock:
+                previous, self.snapshot = self.snapshot, snapshot
+            if previous and previous.get("arrow_file"):
+                arrow_store.close_dataset(previous["arrow_file"])  # Unmap the old version once swapped out
+            if previous and previous["db_file"] != snapshot["db_file"]:
+                query_engine.close_connections(previous["db_file"])
+            logging.info(f"Swapped in data version {manifest['version']}")
+        except Exception as e:
+            logging.error(f"Error loading data version {manifest['version']}: {e}")
+        finally:
+            with self.lock:
+                self.loading_version = None
+
+
+def default_holder():
+    """
+    Return the process-wide snapshot holder, creating it on first use.
+
+    The dashboard and the boot-time prewarm share it, so a snapshot loaded
+    before the server starts is the one the first session sees.
+    """
+    global _default_holder
+    with _default_lock:
+        if _default_holder is None:
+            _default_holder = SnapshotHolder()
+        return _default_holder
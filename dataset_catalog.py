@@ -0,0 +1,194 @@
+import pyarrow.parquet as pq
+import pyarrow as pa
+import requests
+import argparse
+import logging
+import json
+import time
+import os
+import query_engine
+
+# Constants
+DATASET_DIR = "dataset"
+CATALOG_FILE = os.path.join(DATASET_DIR, "catalog.json")
+PARTITION_FILE = "league_players.parquet"
+BOOTSTRAP_URL = "https://fantasy.premierleague.com/api/bootstrap-static/"
+
+# Teams for seasons captured before the catalog existed
+KNOWN_SEASON_TEAMS = {
+    "2024-25": query_engine.EPL_TEAMS,
+}
+
+# Per-partition summary stats kept in the catalog, so comparisons need no data reads
+SUMMARY_COLUMNS = ["total", "event_total", "years_active"]
+
+
+def partition_path(season, gameweek, dataset_dir=DATASET_DIR):
+    """
+    Return the file path of a season/gameweek partition.
+    """
+    return os.path.join(dataset_dir, f"season={season}", f"gameweek={int(gameweek):02d}", PARTITION_FILE)
+
+
+def load_catalog(catalog_file=CATALOG_FILE):
+    """
+    Return the dataset catalog, or an empty one if nothing has been written.
+    """
+    try:
+        with open(catalog_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"seasons": {}, "current": None}
+
+
+def save_catalog(catalog, catalog_file=CATALOG_FILE):
+    """
+    Write the catalog to a temporary file and move it into place.
+    """
+    os.makedirs(os.path.dirname(catalog_file), exist_ok=True)
+    tmp_path = f"{catalog_file}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, indent=2)
+    os.replace(tmp_path, catalog_file)
+
+
+def fetch_current_gameweek():
+    """
+    Return (season, gameweek, teams) for the live FPL season from bootstrap-static.
+
+    The gameweek is None before the first deadline, when no event is current.
+    """
+    response = requests.get(BOOTSTRAP_URL, timeout=10)
+    response.raise_for_status()
+    data = response.json()
+
+    events = data.get("events", [])
+    current = next((event for event in events if event.get("is_current")), None)
+    gameweek = current["id"] if current else None
+    start_year = int(events[0]["deadline_time"][:4]) if events else int(time.strftime("%Y"))
+    season = f"{start_year}-{(start_year + 1) % 100:02d}"
+    teams = [team["name"] for team in sorted(data.get("teams", []), key=lambda team: team["id"])]
+    return season, gameweek, teams
+
+
+def season_teams(season, catalog=None, default=query_engine.EPL_TEAMS):
+    """
+    Return the team list for a season, indexed by favourite_team - 1.
+
+    Seasons neither in the catalog nor in KNOWN_SEASON_TEAMS get `default`.
+    """
+    catalog = catalog or load_catalog()
+    teams = catalog["seasons"].get(season, {}).get("teams")
+    return teams or KNOWN_SEASON_TEAMS.get(season, default)
+
+
+def write_partition(df, season, gameweek, teams=None, dataset_dir=DATASET_DIR):
+    """
+    Write a cleaned league snapshot as the partition for a season and gameweek.
+
+    The Parquet file is moved into place before the catalog is updated, so
+    readers never see a catalog entry for a half-written partition.
+    """
+    path = partition_path(season, gameweek, dataset_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    # Categories mixing numbers with "Unknown" (e.g. favourite_team) have no single Arrow type
+    mixed = [col for col in df.columns if df[col].dtype == "category" and df[col].cat.categories.inferred_type.startswith("mixed")]
+    table = pa.Table.from_pandas(df.astype({col: str for col in mixed}), preserve_index=False)
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+    catalog_file = os.path.join(dataset_dir, "catalog.json")
+    catalog = load_catalog(catalog_file)
+    season_entry = catalog["seasons"].setdefault(season, {"teams": None, "gameweeks": {}})
+    season_entry["teams"] = teams or season_entry["teams"] or KNOWN_SEASON_TEAMS.get(season)
+    season_entry["gameweeks"][str(int(gameweek))] = {
+        "path": os.path.relpath(path, dataset_dir),
+        "rows": len(df),
+        "written_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "summary": {
+            col: {"mean": float(df[col].mean()), "max": float(df[col].max())}
+            for col in SUMMARY_COLUMNS if col in df.columns and len(df)
+        },
+    }
+
+    # The newest season/gameweek is the one the dashboard shows
+    current = catalog.get("current")
+    if current is None or (season, int(gameweek)) >= (current["season"], current["gameweek"]):
+        catalog["current"] = {"season": season, "gameweek": int(gameweek)}
+    save_catalog(catalog, catalog_file)
+    logging.info(f"Wrote partition season={season} gameweek={gameweek} ({len(df)} rows)")
+    return path
+
+
+def list_partitions(seasons=None, gameweeks=None, catalog=None):
+    """
+    Return (season, gameweek, path) for the catalog partitions matching the filters.
+
+    `gameweeks` may be a collection of gameweek numbers or "latest" for the
+    newest gameweek of each season.
+    """
+    catalog = catalog or load_catalog()
+    selected = []
+    for season, season_entry in sorted(catalog["seasons"].items()):
+        if seasons is not None and season not in seasons:
+            continue
+        available = sorted(int(gw) for gw in season_entry["gameweeks"])
+        if gameweeks == "latest":
+            wanted = available[-1:]
+        elif gameweeks is not None:
+            wanted = [gw for gw in available if gw in set(gameweeks)]
+        else:
+            wanted = available
+        for gameweek in wanted:
+            selected.append((season, gameweek, season_entry["gameweeks"][str(gameweek)]["path"]))
+    return selected
+
+
+def read_partitions(seasons=None, gameweeks=None, columns=None, filters=None, dataset_dir=DATASET_DIR):
+    """
+    Read only the partitions (and columns) a query needs into one DataFrame.
+
+    Partitions are pruned through the catalog before any file is opened;
+    `columns` and pyarrow `filters` are pushed down into the Parquet reader.
+    Adds `season` and `gameweek` columns to the result.
+    """
+    catalog = load_catalog(os.path.join(dataset_dir, "catalog.json"))
+    tables = []
+    for season, gameweek, path in list_partitions(seasons, gameweeks, catalog):
+        table = pq.read_table(os.path.join(dataset_dir, path), columns=columns, filters=filters)
+        table = table.append_column("season", pa.array([season] * table.num_rows, pa.string()))
+        table = table.append_column("gameweek", pa.array([gameweek] * table.num_rows, pa.int16()))
+        tables.append(table)
+    if not tables:
+        return pa.table({}).to_pandas()
+    return pa.concat_tables(tables, promote_options="default").to_pandas()
+
+
+def season_summary(column="total", catalog=None):
+    """
+    Compare seasons from catalog stats alone, using each season's latest gameweek.
+    """
+    catalog = catalog or load_catalog()
+    rows = []
+    for season, gameweek, _ in list_partitions(gameweeks="latest", catalog=catalog):
+        entry = catalog["seasons"][season]["gameweeks"][str(gameweek)]
+        stats = entry["summary"].get(column, {})
+        rows.append({"season": season, "gameweek": gameweek, "managers": entry["rows"], **stats})
+    return rows
+
+
+# Main execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare seasons in the dataset catalog.")
+    parser.add_argument("--column", default="total", choices=SUMMARY_COLUMNS, help="Summary column to compare")
+    args = parser.parse_args()
+
+    rows = season_summary(args.column)
+    if not rows:
+        print("No partitions in the catalog yet.")
+    for row in rows:
+        print(
+            f"{row['season']} GW{row['gameweek']}: {row['managers']} managers, "
+            f"{args.column} mean {row.get('mean', float('nan')):.1f}, max {row.get('max', float('nan')):.0f}"
+        )
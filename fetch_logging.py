@@ -0,0 +1,183 @@
+import logging.handlers
+import threading
+import logging
+import atexit
+import queue
+import time
+import os
+
+# Constants
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+LOG_LEVEL = os.environ.get("FPL_LOG_LEVEL", "INFO").upper()
+MAX_BYTES = 10 * 1024 * 1024  # Log file size before it is rotated
+BACKUP_COUNT = 5  # Rotated log files kept
+SUMMARY_INTERVAL = 30  # Seconds between rolled-up progress lines
+RATE_WINDOW = 60  # Seconds per rate-limit window
+RATE_LIMIT = 5  # Messages per rate key and window before the rest are only counted
+
+_listener = None
+_reporter = None
+_stop = threading.Event()
+_progress = []
+_progress_lock = threading.Lock()
+_rate_filter = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let through the first RATE_LIMIT records per rate key and window, and count the rest.
+
+    Only records logged with extra={"rate_key": ...} are limited, so
+    one-off messages always get through.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.windows = {}  # rate key -> [window start, passed, suppressed]
+
+    def filter(self, record):
+        key = getattr(record, "rate_key", None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= RATE_WINDOW:
+                suppressed = window[2] if window else 0
+                self.windows[key] = window = [now, 0, suppressed]
+            if window[1] < RATE_LIMIT:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+    def take_suppressed(self):
+        """
+        Return and reset {rate key: suppressed count} for keys that dropped messages.
+        """
+        with self.lock:
+            suppressed = {key: window[2] for key, window in self.windows.items() if window[2]}
+            for key in suppressed:
+                self.windows[key][2] = 0
+        return suppressed
+
+
+class Progress:
+    """
+    Thread-safe outcome counters, logged as one rolled-up line every SUMMARY_INTERVAL.
+
+    Workers call add() per request instead of logging it, which costs an
+    uncontended lock and a dict update.
+    """
+
+    def __init__(self, name, total=None):
+        self.name = name
+        self.total = total
+        self.counts = {}
+        self.lock = threading.Lock()
+        self.started = self.reported_at = time.monotonic()
+        self.reported = 0
+        with _progress_lock:
+            _progress.append(self)
+
+    def add(self, outcome="done", n=1):
+        with self.lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + n
+
+    def done(self):
+        with self.lock:
+            return sum(self.counts.values())
+
+    def summary(self, final=False):
+        with self.lock:
+            counts = dict(self.counts)
+        done = sum(counts.values())
+        now = time.monotonic()
+        if final:
+            rate = done / max(now - self.started, 1e-9)
+        else:
+            rate = (done - self.reported) / max(now - self.reported_at, 1e-9)
+        self.reported, self.reported_at = done, now
+        total = f"/{self.total}" if self.total is not None else ""
+        outcomes = ", ".join(f"{outcome} {count}" for outcome, count in sorted(counts.items()))
+        return f"{self.name}: {done}{total} ({outcomes or 'none yet'}), {rate:.1f}/s"
+
+    def close(self):
+        with _progress_lock:
+            if self in _progress:
+                _progress.remove(self)
+        logging.info(f"{self.summary(final=True)} in {time.monotonic() - self.started:.1f}s")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def report():
+    """
+    Log one line per open Progress that moved, and the counts of rate-limited messages.
+    """
+    with _progress_lock:
+        progress = list(_progress)
+    for counter in progress:
+        if counter.done() != counter.reported:
+            logging.info(counter.summary())
+    if _rate_filter is not None:
+        for key, count in _rate_filter.take_suppressed().items():
+            logging.info(f"Suppressed {count} more '{key}' messages")
+
+
+def _report_loop():
+    while not _stop.wait(SUMMARY_INTERVAL):
+        report()
+
+
+def configure(log_file, level=LOG_LEVEL):
+    """
+    Send the root logger through a queue to a rotating log file and the console.
+
+    Callers only enqueue records; a listener thread does the formatting and
+    I/O, so fetch threads never block on the disk or terminal. Like
+    logging.basicConfig, this does nothing if the root logger already has
+    handlers.
+    """
+    global _listener, _reporter, _rate_filter
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding="utf-8")
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    _rate_filter = RateLimitFilter()
+    queue_handler.addFilter(_rate_filter)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler)
+    _listener.start()
+    _reporter = threading.Thread(target=_report_loop, name="fetch-logging-summary", daemon=True)
+    _reporter.start()
+    atexit.register(shutdown)
+
+
+def shutdown():
+    """
+    Log the final summaries and flush every queued record to the handlers.
+    """
+    global _listener
+    _stop.set()
+    if _reporter is not None:
+        _reporter.join()
+    report()
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,17 +1,16 @@
 import requests
 import logging
+import json
 import csv
 import os
+import response_archive
+import fetch_logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("fetch_league.log"),
-        logging.StreamHandler()
-    ]
-)
+# Constants
+PAGE_SIZE = 50  # Managers per standings page
+MAX_VERIFY_ROUNDS = 5  # Targeted re-fetch rounds before saving an inconsistent snapshot anyway
+MAX_FAILED_PAGES = 3  # Consecutive failed pages before the crawl stops
+CHECKPOINT_SUFFIX = ".pages.jsonl"  # Fetched pages spilled next to the output CSV, so a crawl can resume
 
 def fetch_league_page(league_id, page):
     """
@@ -21,70 +20,241 @@ def fetch_league_page(league_id, page):
     try:
         response = requests.get(base_url, params={"page_standings": page})
         response.raise_for_status()
-        return response.json()
+        data = response.json()
+        response_archive.record("league-standings", f"{league_id}:{page}", data)  # Keep the full response for offline replay
+        return data
     except requests.RequestException as e:
-        logging.error(f"Error fetching page {page} for league {league_id}: {e}")
+        logging.error(f"Error fetching page {page} for league {league_id}: {e}", extra={"rate_key": "standings page error"})
         return None
 
 def save_to_csv(file_name, data):
     """
-    Save data to a CSV file incrementally.
+    Save a standings snapshot to a CSV file, replacing any previous one.
     """
-    file_exists = os.path.isfile(file_name)
-    
-    with open(file_name, mode='a', newline='', encoding='utf-8') as csv_file:
+    # Write to a temporary file first so readers never see a half-written CSV
+    with open(f"{file_name}.tmp", mode='w', newline='', encoding='utf-8') as csv_file:
         writer = csv.writer(csv_file)
-        
-        # Write header only if the file is new
-        if not file_exists:
-            writer.writerow([
-                "player_id", "event_total", "player_name", 
-                "rank", "last_rank", "total", "entry", "entry_name", "has_played"
-            ])
-        
+        writer.writerow([
+            "player_id", "event_total", "player_name",
+            "rank", "last_rank", "total", "entry", "entry_name", "has_played"
+        ])
+
         for player in data:
             writer.writerow([
                 player["id"], player["event_total"], player["player_name"],
                 player["rank"], player["last_rank"], player["total"],
                 player["entry"], player["entry_name"], player["has_played"]
             ])
+    os.replace(f"{file_name}.tmp", file_name)
 
-def fetch_and_save_all_players(league_id, file_name):
+def load_page_checkpoint(checkpoint_path):
     """
-    Fetch all players from the league and save incrementally to a CSV file.
+    Load the pages spilled by an interrupted crawl as {page: data}; later lines win.
     """
-    page = 5063
-    total_players = 0
-    
-    while True:
-        logging.info(f"Fetching page {page} for league {league_id}...")
-        data = fetch_league_page(league_id, page)
-        
-        if not data:
-            logging.warning("No data returned. Stopping.")
-            break
-        
-        standings = data.get("standings", {}).get("results", [])
-        if not standings:
+    pages = {}
+    if not os.path.exists(checkpoint_path):
+        return pages
+    # End a line cut short by the interruption, so the resumed crawl's first record starts on its own line
+    with open(checkpoint_path, "rb+") as f:
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by an interruption; later lines are still whole
+            pages[record.pop("page")] = record
+    return pages
+
+def page_positions(page, standings):
+    """
+    Return the league positions of a page's rows (rank_sort, or row order if absent).
+    """
+    first = (page - 1) * PAGE_SIZE + 1
+    return [player.get("rank_sort") or first + i for i, player in enumerate(standings)]
+
+def page_ranges(pages):
+    """
+    Format page numbers as compact ranges for logging, e.g. "3-5, 9".
+    """
+    ranges = []
+    for page in sorted(pages):
+        if ranges and page == ranges[-1][1] + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+def find_inconsistent_pages(pages, first_page, last_page):
+    """
+    Return the pages that do not join into one consistent standings snapshot.
+
+    A page is flagged when it is missing, was served from an older standings
+    update than the newest page seen, does not hold exactly its own run of
+    positions, shares a manager with another page, or breaks the ordering of
+    totals and ranks across its boundary with the previous page.
+    """
+    flagged = set()
+    newest = max((data["updated"] for data in pages.values() if data["updated"]), default=None)
+    seen = {}
+    previous = None
+
+    for page in range(first_page, last_page + 1):
+        data = pages.get(page)
+        if data is None:
+            flagged.add(page)
+            previous = None
+            continue
+        standings = data["results"]
+
+        if newest and data["updated"] != newest:
+            flagged.add(page)
+
+        first = (page - 1) * PAGE_SIZE + 1
+        full_page = page == last_page or len(standings) == PAGE_SIZE
+        if not full_page or page_positions(page, standings) != list(range(first, first + len(standings))):
+            flagged.add(page)
+
+        for player in standings:
+            other = seen.setdefault(player["entry"], page)
+            if other != page:
+                flagged.update((other, page))  # Moved between pages while they were fetched
+
+        # Totals never rise and ranks never fall from one page to the next
+        if previous and standings:
+            last, head = previous[-1], standings[0]
+            if head["total"] > last["total"] or head["rank"] < last["rank"] or (
+                head["total"] < last["total"] and head["rank"] == last["rank"]
+            ):
+                flagged.update((page - 1, page))
+        previous = standings
+
+    return flagged
+
+def fetch_page_into(pages, league_id, page, checkpoint=None):
+    """
+    Fetch one standings page into `pages`, and append it to the checkpoint file if given.
+    Returns (fetched, has_next).
+    """
+    data = fetch_league_page(league_id, page)
+    if not data:
+        return False, False
+    standings = data.get("standings", {})
+    pages[page] = {
+        "results": standings.get("results", []), "updated": data.get("last_updated_data"),
+        "has_next": standings.get("has_next", False),
+    }
+    if checkpoint is not None and pages[page]["results"]:
+        checkpoint.write(json.dumps({"page": page, **pages[page]}) + "\n")
+        checkpoint.flush()
+    return True, pages[page]["has_next"]
+
+def fetch_consistent_standings(league_id, first_page=1, checkpoint_path=None):
+    """
+    Crawl the league standings and repair them into one consistent snapshot.
+
+    Standings shift while a long crawl runs, so managers can be seen twice or
+    not at all. After the crawl, pages that fail the continuity checks are
+    re-fetched on their own, in a window that widens each round, until the
+    snapshot is consistent (or MAX_VERIFY_ROUNDS is reached), instead of
+    crawling the whole league again.
+
+    Every fetched page is appended to `checkpoint_path` as it arrives; a
+    crawl that finds pages there resumes after the last one instead of
+    starting again, and the verify rounds repair any drift in between.
+    """
+    pages = {}
+    page = last_page = first_page
+    crawling = True
+    if checkpoint_path:
+        pages = {number: data for number, data in load_page_checkpoint(checkpoint_path).items() if number >= first_page}
+        if pages:
+            last_page = max(pages)
+            page, crawling = last_page + 1, pages[last_page]["has_next"]
+            logging.info(f"Resuming from {len(pages)} checkpointed pages, up to page {last_page}.")
+    checkpoint = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+    try:
+        return crawl_and_verify(league_id, pages, first_page, page, last_page, crawling, checkpoint)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+def crawl_and_verify(league_id, pages, first_page, page, last_page, crawling, checkpoint):
+    """
+    Crawl from `page` until the last page (unless `crawling` is False), then repair inconsistent pages.
+    """
+    failures = 0
+    progress = fetch_logging.Progress(f"Standings pages for league {league_id}")
+    while crawling and failures < MAX_FAILED_PAGES:
+        logging.debug(f"Fetching page {page} for league {league_id}...")
+        fetched, has_next = fetch_page_into(pages, league_id, page, checkpoint)
+        if not fetched:
+            # Failed pages are left missing and re-fetched with the inconsistent ones
+            failures += 1
+            progress.add("failed")
+            logging.warning(f"No data returned for page {page}.", extra={"rate_key": "standings page missing"})
+            last_page, page = page, page + 1
+            continue
+        failures = 0
+        if not pages[page]["results"]:
             logging.info("No more standings data found. Stopping.")
+            del pages[page]
             break
-        
-        # Save to CSV
-        save_to_csv(file_name, standings)
-        total_players += len(standings)
-        logging.info(f"Saved {len(standings)} players from page {page}. Total so far: {total_players}")
-        
-        # Check if there are more pages
-        if not data.get("standings", {}).get("has_next", False):
+        progress.add("fetched")
+        logging.debug(f"Fetched {len(pages[page]['results'])} players from page {page}.")
+        last_page = page
+        if not has_next:
             logging.info("Reached the last page of standings.")
             break
-        
         page += 1
+    progress.close()
+
+    if not pages:
+        return []
+
+    for verify_round in range(1, MAX_VERIFY_ROUNDS + 1):
+        flagged = find_inconsistent_pages(pages, first_page, last_page)
+        if not flagged:
+            logging.info(f"Standings are consistent across pages {first_page}-{last_page}.")
+            break
+        # A conflict that persists after a re-fetch means older pages are stale too, so widen the window each round
+        window = 2 ** (verify_round - 1)
+        flagged |= {page - k for page in flagged for k in range(1, window) if page - k >= first_page}
+        logging.warning(f"Round {verify_round}: re-fetching {len(flagged)} inconsistent pages: {page_ranges(flagged)}")
+        for page in sorted(flagged):
+            fetched, has_next = fetch_page_into(pages, league_id, page, checkpoint)
 
-    logging.info(f"Finished fetching players. Total players fetched: {total_players}")
+            # New managers joined during the crawl: follow the standings to the new last page
+            while fetched and has_next and page == last_page:
+                last_page = page = page + 1
+                fetched, has_next = fetch_page_into(pages, league_id, page, checkpoint)
+    else:
+        flagged = find_inconsistent_pages(pages, first_page, last_page)
+        if flagged:
+            logging.error(f"Standings still inconsistent after {MAX_VERIFY_ROUNDS} rounds on pages: {page_ranges(flagged)}")
+
+    return [player for page in sorted(pages) for player in pages[page]["results"]]
+
+def fetch_and_save_all_players(league_id, file_name, first_page=1):
+    """
+    Fetch a consistent snapshot of all players in the league and save it to a CSV file.
+
+    Pages are checkpointed next to the CSV while the crawl runs, so an
+    interrupted run resumes; the checkpoint is removed once the CSV is saved.
+    """
+    checkpoint_path = f"{file_name}{CHECKPOINT_SUFFIX}"
+    players = fetch_consistent_standings(league_id, first_page, checkpoint_path)
+    save_to_csv(file_name, players)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    logging.info(f"Finished fetching players. Total players fetched: {len(players)}")
 
 # Main execution
 if __name__ == "__main__":
+    fetch_logging.configure("fetch_league.log")
     league_id = 131  # Replace with your league ID
     output_file = "league_players.csv"
     fetch_and_save_all_players(league_id, output_file)
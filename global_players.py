@@ -2,13 +2,11 @@ import requests
 import threading
 import logging
 import csv
+import response_archive
+import fetch_logging
 
 # Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[logging.FileHandler('fpl_country_fetch.log'), logging.StreamHandler()]
-)
+fetch_logging.configure('fpl_country_fetch.log')
 
 # CSV output file
 output_file = 'fpl_country_data.csv'
@@ -20,6 +18,7 @@ def fetch_league_data(league_id, results):
         response = requests.get(url, timeout=10)
         response.raise_for_status()  # Raise HTTPError for bad responses (4xx and 5xx)
         data = response.json()
+        response_archive.record("league-standings", f"{league_id}:1", data)  # Keep the full response for offline replay
         
         # Extract relevant details
         country_name = data.get('league', {}).get('name', f"Unknown-{league_id}")
@@ -29,11 +28,11 @@ def fetch_league_data(league_id, results):
             first_player_entry = standings[0].get('entry', None)
             if first_player_entry:
                 results.append({'League ID': league_id, 'Country': country_name, 'First Player Entry': first_player_entry})
-                logging.info(f"Fetched: {country_name} (League ID: {league_id}, First Player Entry: {first_player_entry})")
+                logging.debug(f"Fetched: {country_name} (League ID: {league_id}, First Player Entry: {first_player_entry})")
         else:
-            logging.warning(f"No standings data for League ID: {league_id}")
+            logging.warning(f"No standings data for League ID: {league_id}", extra={"rate_key": "no standings"})
     except Exception as e:
-        logging.error(f"Error fetching League ID {league_id}: {e}")
+        logging.error(f"Error fetching League ID {league_id}: {e}", extra={"rate_key": "league error"})
 
 # Function to save results to CSV
 def save_to_csv(data):
@@ -48,11 +47,13 @@ def main():
     threads = []
     results = []  # Shared results list
     lock = threading.Lock()  # Lock to prevent race conditions
+    progress = fetch_logging.Progress("Country leagues", total=len(range(21, 276)))
 
     # Worker function to ensure thread safety
     def thread_worker(league_id):
         temp_results = []
         fetch_league_data(league_id, temp_results)
+        progress.add("found" if temp_results else "missing")
         with lock:
             results.extend(temp_results)
 
@@ -65,6 +66,7 @@ def main():
     # Wait for all threads to complete
     for thread in threads:
         thread.join()
+    progress.close()
 
     # Save results to CSV
     save_to_csv(results)
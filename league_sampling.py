@@ -0,0 +1,343 @@
+import numpy as np
+import pandas as pd
+import argparse
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+import fetch_logging
+from fetch_players import fetch_league_page, PAGE_SIZE, MAX_FAILED_PAGES
+
+# Constants
+COUNTRY_FILE = "fpl_country_data_with_counts.csv"
+STATS_FILE = "fpl_country_sample_stats.csv"
+DISTRIBUTIONS_FILE = "fpl_country_sample_distributions.csv"
+TOP_PAGES = 20  # Leading pages always fetched in full (the top 1,000 managers)
+SAMPLE_PAGES = 200  # Pages sampled across the rest of the rank range
+STRATA = 20  # Equal-width rank bands the sample is spread over
+MIN_STRATUM_PAGES = 2  # Sampled pages per band, so every band has a variance estimate
+THREADS = 8  # Concurrent page requests
+Z_95 = 1.96  # Normal quantile for 95% confidence intervals
+PERCENTILES = [1, 5, 10, 25, 50, 75, 90, 95, 99]  # Top-x% cut-offs reported for total points
+HISTOGRAM_BINS = 25
+
+
+def page_results(data):
+    """
+    Return (rows, has_next) of a standings response.
+    """
+    standings = (data or {}).get("standings", {})
+    return standings.get("results", []), standings.get("has_next", False)
+
+
+def fetch_rows(league_id, page):
+    """
+    Fetch one page's (rows, has_next), retrying failed requests so they are not mistaken for empty pages.
+    """
+    for _ in range(MAX_FAILED_PAGES):
+        data = fetch_league_page(league_id, page)
+        if data is not None:
+            return page_results(data)
+    raise RuntimeError(f"Could not fetch page {page} of league {league_id}")
+
+
+def find_last_page(league_id, expected_managers):
+    """
+    Return (last page number, its rows), starting from the page the expected manager count points at.
+
+    The counts file is only a hint, as leagues keep growing: the search
+    gallops forward or back from the hinted page until it has a page with
+    rows and an empty page after it, then bisects between them.
+    """
+    page = max(1, math.ceil(expected_managers / PAGE_SIZE))
+    rows, has_next = fetch_rows(league_id, page)
+    if rows and not has_next:
+        return page, rows
+
+    found, empty, step = None, None, 1  # found: a page with rows and more after it; empty: a page past the end
+    if rows:
+        found = (page, rows)
+        while empty is None:
+            page = found[0] + step
+            rows, has_next = fetch_rows(league_id, page)
+            if rows and not has_next:
+                return page, rows
+            if rows:
+                found = (page, rows)
+                step *= 2
+            else:
+                empty = page
+    else:
+        empty = page
+        while found is None:
+            if empty == 1:
+                return 1, []
+            page = max(1, empty - step)
+            rows, has_next = fetch_rows(league_id, page)
+            if rows and not has_next:
+                return page, rows
+            if rows:
+                found = (page, rows)
+            else:
+                empty = page
+                step *= 2
+
+    while empty - found[0] > 1:
+        page = (found[0] + empty) // 2
+        rows, has_next = fetch_rows(league_id, page)
+        if rows and not has_next:
+            return page, rows
+        if rows:
+            found = (page, rows)
+        else:
+            empty = page
+    return found  # The standings shifted while searching; the last page seen with rows is the end
+
+
+def sample_plan(last_page, top_pages, sample_pages, rng):
+    """
+    Return (census pages, [(stratum pages, sampled pages)]) for a league of last_page pages.
+
+    The top pages and the last page are fetched in full; the pages between
+    are split into STRATA equal bands of the rank range and each band gets
+    an equal share of the sample, drawn without replacement. Small leagues
+    are simply fetched in full.
+    """
+    middle = np.arange(top_pages + 1, last_page)
+    if len(middle) <= sample_pages:
+        return list(range(1, last_page + 1)), []
+    census = list(range(1, top_pages + 1)) + [last_page]
+    strata = []
+    bands = np.array_split(middle, min(STRATA, len(middle) // MIN_STRATUM_PAGES))
+    per_band = max(MIN_STRATUM_PAGES, sample_pages // len(bands))
+    for band in bands:
+        sampled = np.sort(rng.choice(band, min(per_band, len(band)), replace=False))
+        strata.append((band, sampled))
+    return census, strata
+
+
+def fetch_pages(league_id, pages, progress):
+    """
+    Fetch standings pages concurrently into {page: rows}; failed pages are left out.
+    """
+    def fetch(page):
+        rows, _ = page_results(fetch_league_page(league_id, page))
+        progress.add("fetched" if rows else "failed")
+        return page, rows
+
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        return {page: rows for page, rows in executor.map(fetch, pages) if rows}
+
+
+def stratified_estimate(census, strata):
+    """
+    Estimate population totals of per-manager values from census and sampled pages.
+
+    `census` is a list of per-manager value arrays (rows x k) that are known
+    exactly; `strata` is a list of (pages in band, [per-page value arrays])
+    for the sampled bands. Each sampled page is a cluster of consecutive
+    managers, so a band's total is its page count times the mean page total,
+    with the usual finite-population variance. Returns (estimates, standard
+    errors) of the totals, each of length k.
+    """
+    total = sum(values.sum(axis=0) for values in census)
+    variance = 0.0
+    for band_pages, page_values in strata:
+        page_totals = np.array([values.sum(axis=0) for values in page_values])
+        n, big_n = len(page_totals), band_pages
+        total = total + big_n * page_totals.mean(axis=0)
+        if n > 1:
+            variance = variance + big_n ** 2 * (1 - n / big_n) * page_totals.var(axis=0, ddof=1) / n
+    return np.asarray(total, dtype=float), np.sqrt(np.asarray(variance, dtype=float) * np.ones_like(total))
+
+
+def total_percentiles(positions, totals, managers):
+    """
+    Bracket the total needed to reach each top-x% cut-off.
+
+    Totals never rise down the standings, so the total at any position lies
+    between the totals at the nearest fetched positions above and below it;
+    the estimate interpolates between them.
+    """
+    order = np.argsort(positions)
+    positions, totals = positions[order], totals[order]
+    rows = []
+    for percentile in PERCENTILES:
+        position = max(1, math.ceil(managers * percentile / 100))
+        after = min(np.searchsorted(positions, position), len(positions) - 1)
+        before = after if positions[after] == position else max(after - 1, 0)
+        estimate = np.interp(position, positions, totals)
+        rows.append({
+            "percentile": percentile, "position": position, "estimate": float(estimate),
+            "low": float(totals[after]), "high": float(totals[before]),
+        })
+    return rows
+
+
+def total_histogram(positions, totals, managers, edges):
+    """
+    Bracket the number of managers in each total-points bin.
+
+    As with the percentiles, the managers on at least a given total are
+    always a prefix of the standings, so that count lies between the last
+    fetched position at or above the total and the first fetched position
+    below it; a bin's count is the difference of two such counts.
+    """
+    order = np.argsort(positions)
+    positions, totals = positions[order], totals[order]
+    at_least = []
+    for edge in edges[:-1]:
+        k = np.searchsorted(-totals, -edge, side="right")  # Fetched rows on at least `edge`
+        above = (positions[k - 1], totals[k - 1]) if k else (0, np.inf)
+        below = (positions[k], totals[k]) if k < len(positions) else (managers + 1, -np.inf)
+        if np.isfinite(above[1]) and np.isfinite(below[1]) and above[1] > below[1]:
+            estimate = above[0] + (above[1] - edge) / (above[1] - below[1]) * (below[0] - above[0])
+        else:
+            estimate = (above[0] + below[0] - 1) / 2
+        at_least.append((above[0], estimate, below[0] - 1))
+    at_least.append((0, 0, 0))  # Nobody is above the last bin
+    bounds = np.array(at_least, dtype=float)
+    low = np.maximum(bounds[:-1, 0] - bounds[1:, 2], 0)
+    high = bounds[:-1, 2] - bounds[1:, 0]
+    return pd.DataFrame({
+        "bin_start": edges[:-1],
+        "bin_end": edges[1:],
+        "estimate": np.clip(bounds[:-1, 1] - bounds[1:, 1], low, high),
+        "low": low,
+        "high": high,
+    })
+
+
+def sample_league(league_id, expected_managers, top_pages=TOP_PAGES, sample_pages=SAMPLE_PAGES, seed=0):
+    """
+    Estimate a league's points distribution from its top pages and a stratified page sample.
+
+    Returns a dict with the manager count, requests made, mean total and
+    gameweek points with 95% intervals, the share of managers who have
+    played, and bounds on the total-points percentiles and histogram.
+    """
+    rng = np.random.default_rng(seed)
+    progress = fetch_logging.Progress(f"League {league_id} sample pages")
+    last_page, last_rows = find_last_page(league_id, expected_managers)
+    managers = (last_page - 1) * PAGE_SIZE + len(last_rows)
+
+    census_pages, strata = sample_plan(last_page, top_pages, sample_pages, rng)
+    wanted = [page for page in census_pages if page != last_page] + [page for _, sampled in strata for page in sampled]
+    pages = fetch_pages(league_id, wanted, progress)
+    pages[last_page] = last_rows
+
+    # Failed pages get one more try; census pages still missing only shrink the means' denominator
+    pages.update(fetch_pages(league_id, [page for page in wanted if page not in pages], progress))
+    fetched_census = [page for page in census_pages if page in pages]
+    fetched_strata = [(band, [page for page in sampled if page in pages]) for band, sampled in strata]
+    missing = len(census_pages) - len(fetched_census)
+    if missing:
+        logging.warning(f"League {league_id}: {missing} fully fetched pages failed; their managers are left out of the estimates.")
+
+    all_rows = [row for page in sorted(pages) for row in pages[page]]
+    totals = np.array([row["total"] for row in all_rows], dtype=float)
+    edges = np.histogram_bin_edges(totals, bins=HISTOGRAM_BINS)
+
+    def values(rows):
+        return np.array([
+            (1, row["total"], row["event_total"], bool(row.get("has_played", True)))  # Manager count first
+            for row in rows
+        ], dtype=float)
+
+    estimate, error = stratified_estimate(
+        [values(pages[page]) for page in fetched_census],
+        [(len(band), [values(pages[page]) for page in sampled]) for band, sampled in fetched_strata if sampled],
+    )
+    progress.close()
+
+    # Means are ratios to the estimated manager count, which is exact unless pages failed
+    def mean_interval(i):
+        mean = estimate[i] / estimate[0]
+        return mean, mean - Z_95 * error[i] / estimate[0], mean + Z_95 * error[i] / estimate[0]
+
+    positions = np.array([
+        row.get("rank_sort") or (page - 1) * PAGE_SIZE + i + 1
+        for page in sorted(pages) for i, row in enumerate(pages[page])
+    ])
+    return {
+        "managers": managers,
+        "pages": last_page,
+        "pages_fetched": len(pages),
+        "mean_total": mean_interval(1),
+        "mean_event_total": mean_interval(2),
+        "share_played": mean_interval(3),
+        "percentiles": total_percentiles(positions, totals, managers),
+        "histogram": total_histogram(positions, totals, managers, edges),
+    }
+
+
+def save_estimates(stats, distributions):
+    """
+    Write the per-country estimates and histograms gathered so far.
+    """
+    for frame, path in [(stats, STATS_FILE), (distributions, DISTRIBUTIONS_FILE)]:
+        frame.to_csv(f"{path}.tmp", index=False)
+        os.replace(f"{path}.tmp", path)
+
+
+def sample_countries(countries, top_pages=TOP_PAGES, sample_pages=SAMPLE_PAGES, seed=0, save=False):
+    """
+    Sample every league in the countries table and return (stats, distributions) DataFrames.
+
+    A league that fails is logged and skipped. With `save`, the output
+    files are rewritten after every country, so an aborted run keeps the
+    countries already sampled.
+    """
+    stats, distributions = [], []
+    for row in countries.itertuples(index=False):
+        league_id, country, expected = row[0], row[1], row[3]
+        try:
+            expected = int(expected)
+        except (TypeError, ValueError):
+            logging.warning(f"Skipping {country}: no national league player count.")
+            continue
+
+        try:
+            result = sample_league(league_id, expected, top_pages, sample_pages, seed)
+        except Exception as e:
+            logging.error(f"Skipping {country} (league {league_id}): {e}")
+            continue
+        record = {
+            "League ID": league_id, "Country": country, "Managers": result["managers"],
+            "Pages": result["pages"], "Pages Fetched": result["pages_fetched"],
+        }
+        for key, label in [("mean_total", "Mean Total"), ("mean_event_total", "Mean GW Points"), ("share_played", "Share Played")]:
+            record[label], record[f"{label} Low"], record[f"{label} High"] = (round(value, 3) for value in result[key])
+        for percentile in result["percentiles"]:
+            label = f"Top {percentile['percentile']}% Total"
+            record[label], record[f"{label} Low"], record[f"{label} High"] = percentile["estimate"], percentile["low"], percentile["high"]
+        stats.append(record)
+        distributions.append(result["histogram"].assign(**{"League ID": league_id, "Country": country}))
+        logging.info(
+            f"{country}: {result['managers']} managers from {result['pages_fetched']}/{result['pages']} pages, "
+            f"mean total {record['Mean Total']:.1f} ({record['Mean Total Low']:.1f}-{record['Mean Total High']:.1f})"
+        )
+        if save:
+            save_estimates(pd.DataFrame(stats), pd.concat(distributions, ignore_index=True))
+
+    distributions = pd.concat(distributions, ignore_index=True) if distributions else pd.DataFrame()
+    return pd.DataFrame(stats), distributions
+
+
+# Main execution
+if __name__ == "__main__":
+    fetch_logging.configure("fpl_country_sample.log")
+    parser = argparse.ArgumentParser(description="Estimate national league points distributions from a stratified page sample.")
+    parser.add_argument("--countries", nargs="+", help="Country names or league IDs to sample (default: all)")
+    parser.add_argument("--top-pages", type=int, default=TOP_PAGES, help="Leading pages fetched in full")
+    parser.add_argument("--sample-pages", type=int, default=SAMPLE_PAGES, help="Pages sampled across the rest of the standings")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the page sample")
+    args = parser.parse_args()
+
+    countries = pd.read_csv(COUNTRY_FILE)
+    if args.countries:
+        wanted = {name.lower() for name in args.countries}
+        countries = countries[countries["Country"].str.lower().isin(wanted) | countries["League ID"].astype(str).isin(wanted)]
+
+    stats, distributions = sample_countries(countries, args.top_pages, args.sample_pages, args.seed, save=True)
+    logging.info(f"Saved estimates for {len(stats)} countries to {STATS_FILE} and {DISTRIBUTIONS_FILE}")
@@ -0,0 +1,150 @@
+import numpy as np
+import requests
+import argparse
+import logging
+import time
+import os
+import response_archive
+import fetch_logging
+import dataset_catalog
+import query_engine
+import arrow_store
+import data_version
+import picks
+
+# Constants
+LIVE_URL = "https://fantasy.premierleague.com/api/event/{gameweek}/live/"
+POLL_INTERVAL = 60  # Seconds between event-live fetches
+LIVE_FILE = "live_standings.parquet"
+
+
+# Function to fetch live player points for a gameweek with retries.
+# The response is archived only when the points differ from `last_points`, so unchanged polls add nothing.
+def fetch_live_points(gameweek, last_points=None, max_retries=3):
+    url = LIVE_URL.format(gameweek=gameweek)
+    retries = 0
+    backoff = 1
+
+    while retries < max_retries:
+        try:
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            element_points = {element["id"]: element["stats"]["total_points"] for element in data.get("elements", [])}
+            if element_points != last_points:
+                response_archive.record("event-live", f"{gameweek}:{time.strftime('%Y%m%dT%H%M%S')}", data)  # Keep the full response for offline replay
+            return element_points
+        except requests.RequestException as e:
+            retries += 1
+            logging.warning(f"Retry {retries}/{max_retries} for live points of GW{gameweek}: {e}", extra={"rate_key": "live retry"})
+            if retries == max_retries:
+                break
+            time.sleep(backoff)
+            backoff *= 2  # Exponential backoff
+
+    logging.error(f"Failed to fetch live points for GW{gameweek} after {max_retries} retries.", extra={"rate_key": "live failed"})
+    return None
+
+
+def load_base_standings(manifest, gameweek):
+    """
+    Return each manager's stored standings and the total the live gameweek adds to.
+
+    If the stored snapshot was taken during the live gameweek, its partial
+    gameweek points are taken back out of the total.
+    """
+    columns = ["entry", "entry_name", "rank", "total", "event_total"]
+    if manifest.get("arrow_file") and os.path.exists(manifest["arrow_file"]):
+        players = arrow_store.open_dataset(manifest["arrow_file"]).select(columns).to_pandas()
+    else:
+        players = query_engine.query(manifest["db_file"], f"SELECT {', '.join(columns)} FROM players")
+
+    stored_gameweek = manifest.get("gameweek")
+    if stored_gameweek == gameweek:
+        players["base_total"] = players["total"] - players["event_total"]
+    else:
+        if stored_gameweek not in (None, gameweek - 1):
+            logging.warning(f"Stored standings are from GW{stored_gameweek}; live totals for GW{gameweek} will be off.")
+        players["base_total"] = players["total"]
+    return players
+
+
+def live_standings(players, matrix, element_points):
+    """
+    Compute provisional gameweek points, totals and ranks for the whole league at once.
+
+    Points come from one sparse mat-vec over the cached picks, less transfer
+    hits; ranks are shared on equal totals, like the official standings.
+    Automatic substitutions and vice-captain promotion are not applied, so
+    points are provisional until the gameweek is finalised.
+    """
+    manager_points = matrix.points(element_points) - matrix.transfer_costs
+
+    # Align the picks matrix rows to the standings
+    entries = players["entry"].to_numpy()
+    live_points = np.zeros(len(entries), dtype=np.int64)
+    has_picks = np.zeros(len(entries), dtype=bool)
+    if len(matrix.manager_ids):
+        rows = np.minimum(np.searchsorted(matrix.manager_ids, entries), len(matrix.manager_ids) - 1)
+        has_picks = matrix.manager_ids[rows] == entries
+        live_points[has_picks] = manager_points[rows[has_picks]]
+
+    # Managers without cached picks keep their stored total, including any points already scored this gameweek
+    live_total = np.where(has_picks, players["base_total"].to_numpy() + live_points, players["total"].to_numpy())
+    ordered = np.sort(live_total)
+    live_rank = len(ordered) - np.searchsorted(ordered, live_total, side="right") + 1
+
+    result = players[["entry", "entry_name", "rank", "base_total"]].copy()
+    result["live_points"] = live_points
+    result["live_total"] = live_total
+    result["live_rank"] = live_rank
+    result["rank_change"] = result["rank"] - live_rank
+    result["has_picks"] = has_picks
+    return result.sort_values(["live_rank", "entry"]).reset_index(drop=True)
+
+
+def live_path(season, gameweek):
+    """
+    Return the live standings file stored alongside a season/gameweek partition.
+    """
+    return os.path.join(os.path.dirname(dataset_catalog.partition_path(season, gameweek)), LIVE_FILE)
+
+
+def save_live(standings, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    standings.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+# Main execution
+if __name__ == "__main__":
+    fetch_logging.configure("live_scoring.log")
+    parser = argparse.ArgumentParser(description="Compute live league standings from event-live points and cached picks.")
+    parser.add_argument("--season", help="Season of the picks (default: current catalog season)")
+    parser.add_argument("--gameweek", type=int, help="Live gameweek (default: current catalog gameweek)")
+    parser.add_argument("--once", action="store_true", help="Compute once instead of polling")
+    parser.add_argument("--interval", type=int, default=POLL_INTERVAL, help="Seconds between polls")
+    args = parser.parse_args()
+
+    current = dataset_catalog.load_catalog().get("current") or {}
+    season = args.season or current.get("season")
+    gameweek = args.gameweek or current.get("gameweek")
+    matrix = picks.PicksMatrix.load(picks.picks_path(season, gameweek))
+    players = load_base_standings(data_version.current_manifest(), gameweek)
+    output = live_path(season, gameweek)
+    logging.info(f"Loaded {len(players)} managers and picks for {len(matrix.manager_ids)} for GW{gameweek}.")
+
+    last_points = None
+    while True:
+        element_points = fetch_live_points(gameweek, last_points)
+        if element_points is not None and element_points != last_points:
+            start = time.perf_counter()
+            standings = live_standings(players, matrix, element_points)
+            save_live(standings, output)
+            logging.info(f"Live standings for GW{gameweek} computed in {time.perf_counter() - start:.2f}s and saved to {output}")
+            print(standings.head(20).to_string(index=False))
+            last_points = element_points
+        if args.once:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,122 @@
+import pandas as pd
+import requests
+import threading
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import response_archive
+
+# Constants
+HISTORY_URL = "https://fantasy.premierleague.com/api/entry/{entry_id}/history/"
+HISTORY_TTL = 300  # Seconds a fetched history is served before it is fetched again
+ERROR_TTL = 30  # Seconds a failed fetch is remembered, so retries do not hammer the API
+CACHE_SIZE = 2048  # Histories kept in memory
+FETCH_THREADS = 4  # Concurrent upstream history requests
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+# Function to fetch a manager's history with retries.
+# Archiving is opt-in: the dashboard and API fetch on the serving path, where
+# loading the archive index would cost memory and first-request latency.
+def fetch_history(entry_id, max_retries=3, archive=False):
+    url = HISTORY_URL.format(entry_id=entry_id)
+    retries = 0
+    backoff = 1
+
+    while True:
+        try:
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            if archive:
+                response_archive.record("entry-history", entry_id, data)  # Keep the full response for offline replay
+            return data
+        except requests.RequestException as e:
+            retries += 1
+            if retries == max_retries or getattr(e.response, "status_code", None) == 404:
+                logging.error(f"Failed to fetch history for manager_id {entry_id}: {e}", extra={"rate_key": "history failed"})
+                raise
+            logging.warning(f"Retry {retries}/{max_retries} for history of manager_id {entry_id}: {e}", extra={"rate_key": "history retry"})
+            time.sleep(backoff)
+            backoff *= 2  # Exponential backoff
+
+
+class HistoryCache:
+    """
+    A TTL cache of manager histories with single-flight fetching.
+
+    Each FPL ID maps to one Future: callers asking for an ID that is already
+    being fetched get the in-flight Future instead of starting a second
+    request, so any number of viewers of a popular manager cost one upstream
+    call per HISTORY_TTL. Fetches run on a small thread pool, so callers can
+    poll Future.done() instead of blocking.
+    """
+
+    def __init__(self, ttl=HISTORY_TTL, error_ttl=ERROR_TTL, size=CACHE_SIZE, fetch=fetch_history):
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.size = size
+        self.fetch = fetch
+        self.entries = OrderedDict()  # FPL ID -> [expires at, Future]
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=FETCH_THREADS, thread_name_prefix="history")
+
+    def request(self, entry_id):
+        """
+        Return the Future of an FPL ID's history, starting a fetch only if none is cached or in flight.
+        """
+        entry_id = int(entry_id)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(entry_id)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(entry_id)
+                return entry[1]
+
+            entry = [float("inf"), None]  # Never expires while in flight
+            entry[1] = self.executor.submit(self.fetch, entry_id)
+            self.entries[entry_id] = entry
+            self.evict()
+        entry[1].add_done_callback(lambda future: self.expire(entry, future))
+        return entry[1]
+
+    def expire(self, entry, future):
+        with self.lock:
+            entry[0] = time.monotonic() + (self.error_ttl if future.exception() else self.ttl)
+
+    def evict(self):
+        # Drop the least recently used finished histories; in-flight fetches are always kept
+        excess = len(self.entries) - self.size
+        for entry_id in list(self.entries):
+            if excess <= 0:
+                break
+            if self.entries[entry_id][1].done():
+                del self.entries[entry_id]
+                excess -= 1
+
+
+def default_cache():
+    """
+    Return the process-wide history cache, creating it on first use.
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = HistoryCache()
+        return _default_cache
+
+
+def history_frames(data):
+    """
+    Split a history response into gameweek, chip and past-season DataFrames.
+    """
+    gameweeks = pd.DataFrame(data.get("current", []), columns=[
+        "event", "points", "total_points", "rank", "overall_rank", "event_transfers",
+        "event_transfers_cost", "points_on_bench", "bank", "value",
+    ])
+    chips = pd.DataFrame(data.get("chips", []), columns=["name", "event", "time"])
+    past = pd.DataFrame(data.get("past", []), columns=["season_name", "total_points", "rank"])
+    return gameweeks, chips, past
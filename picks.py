@@ -0,0 +1,245 @@
+import scipy.sparse as sp
+import numpy as np
+import pandas as pd
+import requests
+import logging
+import argparse
+import time
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import response_archive
+import dataset_catalog
+import query_engine
+import data_version
+import fetch_logging
+
+# Constants
+THREADS = 10  # Number of threads for parallel API calls
+CHECKPOINT_EVERY = 5000  # Managers fetched between saves of the picks file
+PICKS_FILE = "picks.npz"
+BOOTSTRAP_URL = "https://fantasy.premierleague.com/api/bootstrap-static/"
+
+
+def picks_path(season, gameweek):
+    """
+    Return the picks file stored alongside a season/gameweek partition.
+    """
+    return os.path.join(os.path.dirname(dataset_catalog.partition_path(season, gameweek)), PICKS_FILE)
+
+
+# Function to fetch a manager's picks for a gameweek with retries
+def fetch_picks(manager_id, gameweek, max_retries=3):
+    url = f"https://fantasy.premierleague.com/api/entry/{manager_id}/event/{gameweek}/picks/"
+    retries = 0
+    backoff = 1
+
+    while retries < max_retries:
+        try:
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            response_archive.record("picks", f"{manager_id}:{gameweek}", data)  # Keep the full response for offline replay
+            return data
+        except requests.RequestException as e:
+            retries += 1
+            logging.warning(f"Retry {retries}/{max_retries} for picks of manager_id {manager_id}: {e}", extra={"rate_key": "picks retry"})
+            if retries == max_retries:
+                break
+            time.sleep(backoff)
+            backoff *= 2  # Exponential backoff
+
+    logging.error(f"Failed to fetch picks for manager_id {manager_id} after {max_retries} retries.", extra={"rate_key": "picks failed"})
+    return None
+
+
+# Extract (elements, multipliers, chip, transfer cost) from a picks response
+def extract_picks(data):
+    picks = data.get("picks", [])
+    elements = [pick["element"] for pick in picks]
+    multipliers = [pick.get("multiplier", 0) for pick in picks]
+    transfer_cost = (data.get("entry_history") or {}).get("event_transfers_cost", 0)
+    return elements, multipliers, data.get("active_chip") or "", transfer_cost
+
+
+def save_picks(path, picks):
+    """
+    Save picks as CSR-style arrays: one row per manager, one column per pick.
+    """
+    manager_ids = np.array(sorted(picks), dtype=np.int64)
+    lengths = np.array([len(picks[manager_id][0]) for manager_id in manager_ids], dtype=np.int64)
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    elements = np.fromiter((e for m in manager_ids for e in picks[m][0]), dtype=np.int16, count=indptr[-1])
+    multipliers = np.fromiter((x for m in manager_ids for x in picks[m][1]), dtype=np.int8, count=indptr[-1])
+    chips = np.array([picks[manager_id][2] for manager_id in manager_ids], dtype="U8")
+    transfer_costs = np.array([picks[manager_id][3] for manager_id in manager_ids], dtype=np.int16)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez_compressed(
+        tmp_path, manager_ids=manager_ids, indptr=indptr, elements=elements, multipliers=multipliers,
+        chips=chips, transfer_costs=transfer_costs,
+    )
+    os.replace(tmp_path, path)
+
+
+def load_picks(path):
+    """
+    Load a picks file back into {manager_id: (elements, multipliers, chip, transfer cost)}.
+    """
+    if not os.path.exists(path):
+        return {}
+    with np.load(path) as f:
+        manager_ids, indptr = f["manager_ids"], f["indptr"]
+        elements, multipliers, chips = f["elements"], f["multipliers"], f["chips"]
+        transfer_costs = f["transfer_costs"] if "transfer_costs" in f else np.zeros(len(manager_ids), dtype=np.int16)
+    return {
+        int(manager_id): (
+            elements[indptr[i]:indptr[i + 1]].tolist(),
+            multipliers[indptr[i]:indptr[i + 1]].tolist(),
+            str(chips[i]),
+            int(transfer_costs[i]),
+        )
+        for i, manager_id in enumerate(manager_ids)
+    }
+
+
+def crawl_picks(manager_ids, gameweek, path):
+    """
+    Fetch picks for every manager and save them, resuming from an existing file.
+    """
+    picks = load_picks(path)
+    pending = [int(manager_id) for manager_id in manager_ids if int(manager_id) not in picks]
+    logging.info(f"Loaded picks for {len(picks)} managers; {len(pending)} left to fetch for GW{gameweek}.")
+
+    progress = fetch_logging.Progress(f"GW{gameweek} picks", total=len(pending))
+    for start in range(0, len(pending), CHECKPOINT_EVERY):
+        batch = pending[start:start + CHECKPOINT_EVERY]
+        with ThreadPoolExecutor(max_workers=THREADS) as executor:
+            futures = {executor.submit(fetch_picks, manager_id, gameweek): manager_id for manager_id in batch}
+            for future in as_completed(futures):
+                data = future.result()
+                if data:
+                    picks[futures[future]] = extract_picks(data)
+                progress.add("fetched" if data else "failed")
+
+        # Save progress
+        save_picks(path, picks)
+        logging.debug(f"Saved picks for {len(picks)} managers to {path}.")
+    progress.close()
+    return path
+
+
+def fetch_player_names():
+    """
+    Return {element id: web_name} from bootstrap-static.
+    """
+    response = requests.get(BOOTSTRAP_URL, timeout=10)
+    response.raise_for_status()
+    return {element["id"]: element["web_name"] for element in response.json().get("elements", [])}
+
+
+class PicksMatrix:
+    """
+    Manager x player sparse matrix of a gameweek's picks.
+
+    Stored values are pick multipliers (0 bench, 1 playing, 2 captain,
+    3 triple captain), so ownership, captaincy and effective ownership for
+    any subset of managers are a single sparse mat-vec each.
+    """
+
+    def __init__(self, manager_ids, indptr, elements, multipliers, chips, transfer_costs=None):
+        self.manager_ids = manager_ids
+        self.chips = chips
+        self.transfer_costs = np.zeros(len(manager_ids), dtype=np.int16) if transfer_costs is None else transfer_costs
+        self.elements, columns = np.unique(elements, return_inverse=True)
+        shape = (len(manager_ids), len(self.elements))
+        self.multipliers = sp.csr_matrix((multipliers.astype(np.int16), columns, indptr), shape=shape)
+        self.owned = sp.csr_matrix((np.ones(len(columns), dtype=np.int16), columns, indptr), shape=shape)
+        self.captained = sp.csr_matrix(((multipliers >= 2).astype(np.int16), columns, indptr), shape=shape)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            transfer_costs = f["transfer_costs"] if "transfer_costs" in f else None
+            return cls(f["manager_ids"], f["indptr"], f["elements"], f["multipliers"], f["chips"], transfer_costs)
+
+    def selection(self, manager_ids=None):
+        """
+        Return a 0/1 weight vector over matrix rows for a subset of managers.
+        """
+        if manager_ids is None:
+            return np.ones(len(self.manager_ids))
+        weights = np.zeros(len(self.manager_ids))
+        if len(self.manager_ids) == 0:
+            return weights
+        manager_ids = np.asarray(manager_ids, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.manager_ids, manager_ids), len(self.manager_ids) - 1)
+        weights[rows[self.manager_ids[rows] == manager_ids]] = 1  # Managers without picks are ignored
+        return weights
+
+    def ownership(self, manager_ids=None, names=None):
+        """
+        Return ownership %, captaincy % and effective ownership per player.
+
+        Effective ownership is the average multiplier x 100: a player owned
+        and captained by everyone has EO 200 (300 with triple captain).
+        """
+        weights = self.selection(manager_ids)
+        count = weights.sum()
+        if count == 0:
+            return pd.DataFrame(columns=["element", "name", "owned_pct", "captain_pct", "effective_ownership"])
+        result = pd.DataFrame({
+            "element": self.elements,
+            "owned_pct": self.owned.T @ weights / count * 100,
+            "captain_pct": self.captained.T @ weights / count * 100,
+            "effective_ownership": self.multipliers.T @ weights / count * 100,
+        })
+        result.insert(1, "name", result["element"].map(names) if names else "")
+        return result.sort_values("effective_ownership", ascending=False).reset_index(drop=True)
+
+    def points(self, element_points):
+        """
+        Return every manager's gameweek points (before hits) from {element id: points}.
+
+        One sparse mat-vec: each pick's multiplier times its player's points.
+        """
+        vector = np.array([element_points.get(int(element), 0) for element in self.elements], dtype=np.int32)
+        return np.asarray(self.multipliers @ vector).ravel()
+
+    def chip_usage(self, manager_ids=None):
+        """
+        Return the share of managers playing each chip.
+        """
+        weights = self.selection(manager_ids).astype(bool)
+        chips = pd.Series(self.chips[weights])
+        return (chips[chips != ""].value_counts() / max(weights.sum(), 1) * 100).rename("pct")
+
+
+# Main execution
+if __name__ == "__main__":
+    fetch_logging.configure("fetch_picks.log")
+    parser = argparse.ArgumentParser(description="Crawl gameweek picks and report effective ownership.")
+    parser.add_argument("--season", help="Season of the picks (default: current catalog season)")
+    parser.add_argument("--gameweek", type=int, help="Gameweek of the picks (default: current catalog gameweek)")
+    parser.add_argument("--report-only", action="store_true", help="Skip crawling and only report ownership")
+    parser.add_argument("--top", type=int, default=1000, help="Report ownership for the top N managers")
+    parser.add_argument("--team", help="Report ownership for managers supporting this favourite team")
+    args = parser.parse_args()
+
+    current = dataset_catalog.load_catalog().get("current") or {}
+    season = args.season or current.get("season")
+    gameweek = args.gameweek or current.get("gameweek")
+    path = picks_path(season, gameweek)
+
+    if not args.report_only:
+        manager_ids = pd.read_csv(query_engine.DATA_FILE, usecols=["entry"])["entry"]
+        crawl_picks(manager_ids, gameweek, path)
+
+    matrix = PicksMatrix.load(path)
+    names = fetch_player_names()
+    db_file = data_version.current_manifest()["db_file"]
+    subset = query_engine.entries(db_file, team=args.team, limit=args.top)
+    label = f"top {args.top} {args.team + ' ' if args.team else ''}managers"
+    print(f"Effective ownership, {label}, GW{gameweek}:")
+    print(matrix.ownership(subset, names).head(20).to_string(index=False))
+    print(matrix.chip_usage(subset).to_string())
@@ -0,0 +1,150 @@
+import contextlib
+import threading
+import functools
+import tracemalloc
+import atexit
+import json
+import time
+import sys
+import os
+
+# Opt-in: FPL_PROFILE=1 enables timers, FPL_PROFILE_SAMPLER=1 adds the sampling profiler,
+# FPL_PROFILE_MEMORY=0 skips allocation tracing (which slows allocation-heavy code)
+ENABLED = os.environ.get("FPL_PROFILE", "") not in ("", "0")
+SAMPLER_ENABLED = ENABLED and os.environ.get("FPL_PROFILE_SAMPLER", "") not in ("", "0")
+MEMORY_ENABLED = ENABLED and os.environ.get("FPL_PROFILE_MEMORY", "1") not in ("", "0")
+REPORT_FILE = os.environ.get("FPL_PROFILE_REPORT", "profile_report.json")
+SAMPLE_INTERVAL = 0.01  # Seconds between stack samples
+TOP_FUNCTIONS = 15  # Hottest functions reported per section
+
+_stats = {}
+_samples = {}
+_lock = threading.Lock()
+_active = {}  # Thread id -> stack of open section names
+_sampler = None
+
+
+def _record(name, wall, cpu, allocated, peak):
+    with _lock:
+        stats = _stats.setdefault(name, {
+            "calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_wall_s": 0.0,
+            "allocated_bytes": 0, "peak_bytes": 0,
+        })
+        stats["calls"] += 1
+        stats["wall_s"] += wall
+        stats["cpu_s"] += cpu
+        stats["max_wall_s"] = max(stats["max_wall_s"], wall)
+        stats["allocated_bytes"] += allocated
+        stats["peak_bytes"] = max(stats["peak_bytes"], peak)
+
+
+@contextlib.contextmanager
+def section(name):
+    """
+    Time a pipeline stage or dashboard section when profiling is enabled.
+
+    Records wall time, CPU time of the calling thread, net bytes allocated
+    and peak traced memory under `name`. The peak is reset at each top-level
+    section, so nested sections report the peak of their enclosing one.
+    Does nothing when disabled.
+    """
+    if not ENABLED:
+        yield
+        return
+
+    thread_id = threading.get_ident()
+    stack = _active.setdefault(thread_id, [])
+    if not stack and MEMORY_ENABLED:
+        tracemalloc.reset_peak()
+    stack.append(name)
+    mem_before, _ = tracemalloc.get_traced_memory()  # (0, 0) when not tracing
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+        mem_after, mem_peak = tracemalloc.get_traced_memory()
+        stack.pop()
+        _record(name, wall, cpu, mem_after - mem_before, max(mem_peak - mem_before, 0))
+
+
+def profiled(name=None):
+    """
+    Decorator form of `section`, named after the function by default.
+    """
+    def decorator(func):
+        section_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with section(section_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _sample_loop(stop_event):
+    own_id = threading.get_ident()
+    while not stop_event.wait(SAMPLE_INTERVAL):
+        frames = sys._current_frames()
+        with _lock:
+            for thread_id, stack in list(_active.items()):
+                if thread_id == own_id or thread_id not in frames:
+                    continue
+                try:
+                    name = stack[-1]
+                except IndexError:
+                    continue  # The section closed while we were sampling
+                code = frames[thread_id].f_code
+                location = f"{code.co_name} ({os.path.basename(code.co_filename)}:{frames[thread_id].f_lineno})"
+                counts = _samples.setdefault(name, {})
+                counts[location] = counts.get(location, 0) + 1
+
+
+def write_report(path=None):
+    """
+    Write per-section timings (and sampled hot spots) to the report file.
+    """
+    if not ENABLED:
+        return None
+    path = path or REPORT_FILE
+    with _lock:
+        sections = {name: dict(stats) for name, stats in _stats.items()}
+        for name, counts in _samples.items():
+            top = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:TOP_FUNCTIONS]
+            sections.setdefault(name, {})["samples"] = [
+                {"function": location, "samples": count, "est_s": round(count * SAMPLE_INTERVAL, 3)}
+                for location, count in top
+            ]
+    report = {
+        "written_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "pid": os.getpid(),
+        "sections": dict(sorted(sections.items(), key=lambda item: item[1].get("wall_s", 0), reverse=True)),
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def start():
+    """
+    Start allocation tracing and the sampler, and write the report at exit.
+    """
+    global _sampler
+    if not ENABLED or _sampler is not None:
+        return
+    if MEMORY_ENABLED and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    stop_event = threading.Event()
+    _sampler = stop_event
+    if SAMPLER_ENABLED:
+        threading.Thread(target=_sample_loop, args=(stop_event,), daemon=True).start()
+    atexit.register(stop_event.set)
+    atexit.register(write_report)
+
+
+start()
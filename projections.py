@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+import logging
+import argparse
+import time
+import os
+from concurrent.futures import ProcessPoolExecutor
+import dataset_catalog
+import query_engine
+import data_version
+import profiling
+
+# Constants
+SEASON_GAMEWEEKS = 38
+N_SIMULATIONS = 1000
+BATCH_SIZE = 16  # Simulated seasons ranked together per batch
+RANK_BINS = 64  # Log-spaced rank buckets used to accumulate rank distributions
+SHRINKAGE_GAMEWEEKS = 5  # Pseudo-gameweeks of league-wide data mixed into each manager's estimate
+PERCENTILES = (10, 50, 90)
+PROJECTIONS_FILE = "projections.parquet"
+
+
+def rank_bin_edges(n_managers, bins=RANK_BINS):
+    """
+    Return log-spaced rank bucket edges covering ranks 1..n_managers.
+    """
+    return np.unique(np.geomspace(1, n_managers + 1, bins + 1).astype(np.int64))
+
+
+def estimate_gameweek_distribution(totals, gameweek, event_totals, history=None):
+    """
+    Estimate each manager's per-gameweek points mean and standard deviation.
+
+    With a history frame (entry, event_total per gameweek, aligned to
+    `totals` by the `entry` index), per-manager estimates are shrunk toward
+    the league-wide distribution. Without one, the mean is the season
+    average so far and the spread is the league-wide spread of the latest
+    gameweek.
+    """
+    league_std = float(np.std(event_totals)) or 1.0
+    if history is None or history.empty:
+        mean = totals.to_numpy(dtype=np.float64) / max(gameweek, 1)
+        return mean, np.full(len(totals), league_std)
+
+    stats = history.groupby("entry")["event_total"].agg(["mean", "var", "count"])
+    stats = stats.reindex(totals.index)
+    league_mean = float(history["event_total"].mean())
+    league_var = float(history["event_total"].var()) or league_std ** 2
+    count = stats["count"].fillna(0).to_numpy()
+    weight = count / (count + SHRINKAGE_GAMEWEEKS)
+    mean = weight * stats["mean"].fillna(league_mean).to_numpy() + (1 - weight) * league_mean
+    var = weight * stats["var"].fillna(league_var).to_numpy() + (1 - weight) * league_var
+    return mean, np.sqrt(var)
+
+
+def simulate_rank_counts(totals, mean, std, remaining, n_sims, edges, seed, batch_size=BATCH_SIZE):
+    """
+    Simulate remaining seasons and count each manager's final rank per bucket.
+
+    The sum of the remaining gameweeks is drawn in one normal draw per
+    manager per simulation. Final totals are rounded to whole points, so
+    each batch is ranked by counting managers per points total (one
+    bincount and a cumulative sum) instead of sorting; tied managers share
+    the best rank, as in the FPL standings.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(totals)
+    n_bins = len(edges) - 1
+    counts = np.zeros(n * n_bins, dtype=np.int32)
+    season_mean = totals + remaining * mean
+    season_std = np.sqrt(remaining) * std
+    offsets = np.arange(n) * n_bins
+
+    for start in range(0, n_sims, batch_size):
+        sims = min(batch_size, n_sims - start)
+        final = season_mean + season_std * rng.standard_normal((sims, n))
+
+        points = np.rint(final).astype(np.int64)
+        points -= points.min(axis=1, keepdims=True)
+        width = int(points.max()) + 1
+        slots = points + np.arange(sims)[:, None] * width
+
+        # Rank 1 is the highest final total: 1 + managers on more points in the same simulation
+        on_points = np.bincount(slots.ravel(), minlength=sims * width).reshape(sims, width)
+        above = np.cumsum(on_points[:, ::-1], axis=1)[:, ::-1] - on_points
+        # Bucket each points total once, then look every manager's bucket up by their total
+        buckets = np.minimum(np.searchsorted(edges, above + 1, side="right") - 1, n_bins - 1).ravel()[slots]
+        counts += np.bincount((offsets + buckets).ravel(), minlength=n * n_bins)
+    return counts.reshape(n, n_bins)
+
+
+def rank_percentiles(counts, edges, percentiles=PERCENTILES):
+    """
+    Read rank percentiles off per-manager bucket counts.
+
+    Ranks inside a bucket are interpolated geometrically, matching the
+    log-spaced bucket edges.
+    """
+    cumulative = np.cumsum(counts, axis=1)
+    n_sims = cumulative[:, -1:]
+    result = {}
+    for p in percentiles:
+        target = n_sims * p / 100
+        bucket = np.argmax(cumulative >= target, axis=1)
+        before = np.take_along_axis(cumulative, bucket[:, None], axis=1)[:, 0] - counts[np.arange(len(counts)), bucket]
+        inside = counts[np.arange(len(counts)), bucket]
+        fraction = np.clip((target[:, 0] - before) / np.maximum(inside, 1), 0, 1)
+        low, high = edges[bucket], edges[bucket + 1]
+        result[p] = np.round(low * (high / low) ** fraction).astype(np.int64)
+    return result
+
+
+def _simulate_worker(args):
+    return simulate_rank_counts(*args)
+
+
+@profiling.profiled("projections.project")
+def project_final_ranks(players, gameweek, history=None, n_sims=N_SIMULATIONS, workers=1, seed=None):
+    """
+    Project end-of-season league rank bands for every manager.
+
+    `players` needs entry, total and event_total columns. Simulations are
+    split across a process pool when `workers` > 1.
+    """
+    players = players.set_index("entry")
+    totals = players["total"].to_numpy(dtype=np.float64)
+    mean, std = estimate_gameweek_distribution(players["total"], gameweek, players["event_total"].to_numpy(), history)
+    remaining = max(SEASON_GAMEWEEKS - gameweek, 0)
+    edges = rank_bin_edges(len(players))
+
+    seeds = np.random.SeedSequence(seed).spawn(max(workers, 1))
+    shares = [n_sims // len(seeds) + (i < n_sims % len(seeds)) for i in range(len(seeds))]
+    jobs = [(totals, mean, std, remaining, share, edges, child) for share, child in zip(shares, seeds) if share]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            counts = sum(executor.map(_simulate_worker, jobs))
+    else:
+        counts = sum(_simulate_worker(job) for job in jobs)
+
+    bands = rank_percentiles(counts, edges)
+    result = pd.DataFrame({"entry": players.index, "total": totals.astype(np.int64)})
+    result["projected_points"] = np.round(totals + remaining * mean).astype(np.int64)
+    for p in PERCENTILES:
+        result[f"rank_p{p}"] = bands[p]
+    return result
+
+
+def projections_path(season, gameweek):
+    """
+    Return the projections file stored alongside a season/gameweek partition.
+    """
+    return os.path.join(os.path.dirname(dataset_catalog.partition_path(season, gameweek)), PROJECTIONS_FILE)
+
+
+# Main execution
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Project end-of-season league rank bands.")
+    parser.add_argument("--sims", type=int, default=N_SIMULATIONS, help="Number of simulated seasons")
+    parser.add_argument("--workers", type=int, default=1, help="Processes to split simulations across")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible projections")
+    args = parser.parse_args()
+
+    manifest = data_version.current_manifest()
+    season, gameweek = manifest.get("season"), manifest.get("gameweek")
+    players = query_engine.query(manifest["db_file"], "SELECT entry, total, event_total FROM players")
+    history = dataset_catalog.read_partitions(seasons=[season], columns=["entry", "event_total"]) if season else None
+
+    start = time.perf_counter()
+    projections = project_final_ranks(players, gameweek or 1, history, args.sims, args.workers, args.seed)
+    logging.info(f"Projected {len(projections)} managers over {args.sims} seasons in {time.perf_counter() - start:.1f}s")
+
+    path = projections_path(season, gameweek) if season and gameweek else PROJECTIONS_FILE
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    projections.to_parquet(path, index=False)
+    logging.info(f"Projections saved to {path}")
@@ -0,0 +1,513 @@
+import sqlite3
+import threading
+import logging
+import unicodedata
+import os
+import numpy as np
+import pandas as pd
+import profiling
+
+# Constants
+DATA_FILE = "cleaned_league_players.csv"
+DB_FILE = "league.db"
+CHUNK_SIZE = 100_000  # Rows loaded into the store per chunk
+MOVERS_SIZE = 100  # Climbers and fallers kept per scope
+SEARCH_CANDIDATES = 200  # Trigram candidates scored per name search
+SEARCH_INSERT_BATCH = 500_000  # Index rows inserted per batch while building
+
+# Map favourite team indices to EPL team names (2024/25; other seasons come from the dataset catalog)
+EPL_TEAMS = [
+    "Arsenal", "Aston Villa", "Bournemouth", "Brentford", "Brighton & Hove Albion", "Chelsea", "Crystal Palace", "Everton", "Fulham", "Ipswich Town", "Leicester City", "Liverpool", "Manchester City", "Manchester United", "Newcastle United", "Nottingham Forest", "Southampton", "Tottenham Hotspur", "West Ham United", "Wolverhampton Wanderers"
+]
+
+# Columns kept in the store
+STORE_COLUMNS = [
+    "player_id", "entry", "entry_name", "player_name", "rank", "last_rank", "total", "event_total",
+    "years_active", "summary_overall_rank", "favourite_team", "favourite_team_name", "joined_date",
+]
+
+# Indexes backing the dashboard filters, top-K queries and group-bys
+INDEXES = {
+    "idx_players_entry": "entry",
+    "idx_players_total": "total DESC",
+    "idx_players_event_total": "event_total DESC",
+    "idx_players_team_total": "favourite_team_name, total DESC",
+    "idx_players_years_total": "years_active, total",
+    "idx_players_joined_date": "joined_date",
+    "idx_players_overall_rank": "summary_overall_rank",
+}
+
+# Columns that queries may sort or bin on
+NUMERIC_COLUMNS = {"total", "event_total", "rank", "last_rank", "years_active", "summary_overall_rank"}
+GROUP_COLUMNS = {"favourite_team_name", "years_active"}
+
+_local = threading.local()
+_retired = set()  # Store files whose cached connections are closed by each thread on its next query
+_retired_lock = threading.Lock()
+
+
+def team_name(team_id, teams=EPL_TEAMS):
+    """
+    Return the EPL team name for a favourite team index, or "Unknown".
+    """
+    if pd.notnull(team_id) and 0 < int(team_id) <= len(teams):
+        return teams[int(team_id) - 1]
+    return "Unknown"
+
+
+def prepare_chunk(chunk, teams=EPL_TEAMS):
+    """
+    Derive the store columns from a chunk of the cleaned CSV.
+    """
+    chunk["favourite_team"] = pd.to_numeric(chunk["favourite_team"], errors="coerce")
+    chunk["favourite_team_name"] = chunk["favourite_team"].map(lambda team_id: team_name(team_id, teams))
+    joined = pd.to_datetime(chunk["joined_time"], errors="coerce", utc=True)
+    chunk["joined_date"] = joined.dt.strftime("%Y-%m-%d")
+    return chunk[STORE_COLUMNS]
+
+
+def build_store(csv_path=DATA_FILE, db_path=DB_FILE, teams=None):
+    """
+    Load the cleaned CSV into an indexed SQLite store.
+
+    `teams` is the season's team list used to name favourite teams.
+
+    The store is written to a temporary file and moved into place once its
+    indexes are built, so readers never see a partially written database.
+    """
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        rows = 0
+        with profiling.section("store.load_rows"):
+            for chunk in pd.read_csv(csv_path, chunksize=CHUNK_SIZE):
+                prepare_chunk(chunk, teams or EPL_TEAMS).to_sql("players", conn, if_exists="append", index=False)
+                rows += len(chunk)
+                logging.info(f"Loaded {rows} rows into {tmp_path}")
+
+        with profiling.section("store.indexes"):
+            for name, columns in INDEXES.items():
+                conn.execute(f"CREATE INDEX {name} ON players ({columns})")
+        build_rank_movers(conn)
+        build_search_index(conn)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, db_path)
+    logging.info(f"Store saved to {db_path} ({rows} rows)")
+    return db_path
+
+
+def select_movers(frame, k):
+    """
+    Pick the top-k rows by rank delta, overall and per favourite team.
+
+    `frame` must already be sorted by delta, largest first.
+    """
+    overall = frame.head(k).assign(scope="Overall")
+    # A stable sort by team keeps the delta order inside each team
+    by_team = frame.sort_values("favourite_team_name", kind="stable")
+    by_team = by_team[by_team.groupby("favourite_team_name").cumcount().to_numpy() < k]
+    by_team = by_team.assign(scope=by_team["favourite_team_name"])
+    movers = pd.concat([overall, by_team], ignore_index=True)
+    movers["position"] = movers.groupby("scope").cumcount() + 1
+    return movers
+
+
+@profiling.profiled("store.rank_movers")
+def build_rank_movers(conn, k=MOVERS_SIZE):
+    """
+    Store the top-k rank climbers and fallers as a small index table.
+    """
+    frame = pd.read_sql_query(
+        """
+        SELECT entry, entry_name, player_name, rank, last_rank, total, favourite_team_name
+        FROM players
+        WHERE rank > 0 AND last_rank > 0
+        """,
+        conn,
+    )
+    frame["rank_change"] = frame["last_rank"].to_numpy() - frame["rank"].to_numpy()
+
+    # One sort serves both directions: climbers from the top, fallers from the bottom
+    order = np.argsort(-frame["rank_change"].to_numpy(), kind="stable")
+    climbers = select_movers(frame.iloc[order], k).assign(direction="climbers")
+    fallers = select_movers(frame.iloc[order[::-1]], k).assign(direction="fallers")
+    climbers = climbers[climbers["rank_change"] > 0]
+    fallers = fallers[fallers["rank_change"] < 0]
+
+    movers = pd.concat([climbers, fallers], ignore_index=True).drop(columns=["favourite_team_name"])
+    movers.to_sql("rank_movers", conn, if_exists="replace", index=False)
+    conn.execute("CREATE INDEX idx_rank_movers ON rank_movers (direction, scope, position)")
+    logging.info(f"Stored {len(movers)} rank movers")
+
+
+def fold_name(name):
+    """
+    Case-fold a name and strip accents and extra whitespace for searching.
+    """
+    if not isinstance(name, str):
+        return ""
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.split())
+
+
+def name_grams(folded):
+    """
+    Return the set of trigrams of a folded name, padded at word boundaries.
+    """
+    padded = f" {folded} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@profiling.profiled("store.search_index")
+def build_search_index(conn):
+    """
+    Build the prefix and trigram name-search tables over entry_name and player_name.
+
+    Prefix rows carry the league rank, so a popular prefix keeps its best-ranked candidates.
+    """
+    conn.execute("CREATE TABLE name_search (entry INTEGER, field TEXT, folded TEXT, rank INTEGER)")
+    conn.execute("CREATE TABLE name_trigrams (gram TEXT, entry INTEGER, PRIMARY KEY (gram, entry)) WITHOUT ROWID")
+
+    names = pd.read_sql_query("SELECT entry, entry_name, player_name, rank FROM players", conn)
+    prefixes, grams = [], []
+    for entry, entry_name, player_name, rank in names.itertuples(index=False):
+        entry_grams = set()
+        for field, name in (("entry_name", entry_name), ("player_name", player_name)):
+            folded = fold_name(name)
+            if folded:
+                prefixes.append((entry, field, folded, None if pd.isna(rank) else int(rank)))
+                entry_grams |= name_grams(folded)
+        grams.extend((gram, entry) for gram in entry_grams)
+
+        if len(grams) >= SEARCH_INSERT_BATCH:
+            conn.executemany("INSERT OR IGNORE INTO name_trigrams VALUES (?, ?)", grams)
+            grams = []
+    conn.executemany("INSERT OR IGNORE INTO name_trigrams VALUES (?, ?)", grams)
+    conn.executemany("INSERT INTO name_search VALUES (?, ?, ?, ?)", prefixes)
+    conn.execute("CREATE INDEX idx_name_search_folded ON name_search (folded)")
+    logging.info(f"Indexed {len(prefixes)} names for search")
+
+
+def get_connection(db_path=DB_FILE):
+    """
+    Return a read-only connection to the store, one per thread.
+
+    The thread's connections to retired store files are closed first.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    with _retired_lock:
+        stale = [path for path in connections if path in _retired and path != db_path]
+    for path in stale:
+        connections.pop(path).close()
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        connections[db_path] = conn
+    return conn
+
+
+def close_connections(db_path):
+    """
+    Retire a store file once no snapshot uses it, closing its cached connections.
+
+    The calling thread's connection is closed now. Connections are per
+    thread and may be mid-query elsewhere, so every other thread closes its
+    own on its next query.
+    """
+    with _retired_lock:
+        _retired.add(db_path)
+    conn = getattr(_local, "connections", {}).pop(db_path, None)
+    if conn is not None:
+        conn.close()
+
+
+def query(db_path, sql, params=()):
+    """
+    Run a query against the store and return a DataFrame.
+    """
+    return pd.read_sql_query(sql, get_connection(db_path), params=params)
+
+
+def _check_column(column, allowed):
+    if column not in allowed:
+        raise ValueError(f"Unsupported column: {column}")
+
+
+def overview_stats(db_path=DB_FILE):
+    """
+    Return the headline metrics shown on the Overview tab.
+    """
+    row = get_connection(db_path).execute(
+        "SELECT COUNT(*), AVG(total), AVG(event_total), AVG(years_active) FROM players"
+    ).fetchone()
+    return {
+        "total_players": row[0],
+        "avg_points": row[1] or 0.0,
+        "avg_event_points": row[2] or 0.0,
+        "avg_years_active": row[3] or 0.0,
+    }
+
+
+def histogram(db_path, column, bins=50, min_value=None):
+    """
+    Bin a numeric column into equal-width buckets inside the store.
+    """
+    _check_column(column, NUMERIC_COLUMNS)
+    where = f"WHERE {column} > ?" if min_value is not None else ""
+    params = (min_value,) if min_value is not None else ()
+
+    low, high = get_connection(db_path).execute(
+        f"SELECT MIN({column}), MAX({column}) FROM players {where}", params
+    ).fetchone()
+    if low is None:
+        return pd.DataFrame(columns=["bin_start", "bin_end", "count"])
+
+    width = max((high - low) / bins, 1)
+    counts = query(
+        db_path,
+        f"""
+        SELECT MIN(CAST((({column}) - ?) / ? AS INTEGER), ?) AS bucket, COUNT(*) AS count
+        FROM players {where}
+        GROUP BY bucket
+        ORDER BY bucket
+        """,
+        (low, width, bins - 1) + params,
+    )
+    counts["bin_start"] = low + counts["bucket"] * width
+    counts["bin_end"] = counts["bin_start"] + width
+    return counts[["bin_start", "bin_end", "count"]]
+
+
+def signups_by_date(db_path=DB_FILE):
+    """
+    Count sign-ups per day.
+    """
+    return query(
+        db_path,
+        """
+        SELECT joined_date, COUNT(*) AS "Number of Players"
+        FROM players
+        WHERE joined_date IS NOT NULL
+        GROUP BY joined_date
+        ORDER BY joined_date
+        """,
+    )
+
+
+def team_counts(db_path=DB_FILE):
+    """
+    Count managers per favourite team.
+    """
+    return query(
+        db_path,
+        """
+        SELECT favourite_team_name AS "Team", COUNT(*) AS "Number of Players"
+        FROM players
+        GROUP BY favourite_team_name
+        ORDER BY COUNT(*) DESC
+        """,
+    )
+
+
+def box_stats(db_path, group_column, value_column="total"):
+    """
+    Compute box plot statistics (quartiles and whiskers) per group.
+
+    Quartiles are picked by row position within each group, walking the
+    (group, value) index, so only one row per group leaves the store.
+    """
+    _check_column(group_column, GROUP_COLUMNS)
+    _check_column(value_column, NUMERIC_COLUMNS)
+    stats = query(
+        db_path,
+        f"""
+        WITH ordered AS (
+            SELECT {group_column} AS grp, {value_column} AS value,
+                   ROW_NUMBER() OVER (PARTITION BY {group_column} ORDER BY {value_column}) - 1 AS pos,
+                   COUNT(*) OVER (PARTITION BY {group_column}) AS n
+            FROM players
+        )
+        SELECT grp,
+               MIN(value) AS min,
+               MAX(CASE WHEN pos = (n - 1) / 4 THEN value END) AS q1,
+               MAX(CASE WHEN pos = (n - 1) / 2 THEN value END) AS median,
+               MAX(CASE WHEN pos = 3 * (n - 1) / 4 THEN value END) AS q3,
+               MAX(value) AS max
+        FROM ordered
+        GROUP BY grp
+        ORDER BY grp
+        """,
+    )
+
+    # Whiskers reach the most extreme values within 1.5 IQR of the box
+    iqr = stats["q3"] - stats["q1"]
+    stats["lower_limit"] = stats["q1"] - 1.5 * iqr
+    stats["upper_limit"] = stats["q3"] + 1.5 * iqr
+    fences = query(
+        db_path,
+        f"""
+        WITH limits(grp, lower_limit, upper_limit) AS (VALUES {", ".join(["(?, ?, ?)"] * len(stats))})
+        SELECT limits.grp,
+               MIN(players.{value_column}) AS lower_fence,
+               MAX(players.{value_column}) AS upper_fence
+        FROM limits
+        JOIN players ON players.{group_column} = limits.grp
+                    AND players.{value_column} BETWEEN limits.lower_limit AND limits.upper_limit
+        GROUP BY limits.grp
+        """,
+        tuple(v for row in stats[["grp", "lower_limit", "upper_limit"]].itertuples(index=False) for v in row),
+    ) if len(stats) else pd.DataFrame(columns=["grp", "lower_fence", "upper_fence"])
+    return stats.merge(fences, on="grp", how="left").drop(columns=["lower_limit", "upper_limit"])
+
+
+def top_n(db_path, order_column, limit, team=None):
+    """
+    Return the top managers by a column, optionally for one favourite team.
+    """
+    _check_column(order_column, NUMERIC_COLUMNS)
+    where = "WHERE favourite_team_name = ?" if team else ""
+    params = (team, limit) if team else (limit,)
+    return query(
+        db_path,
+        f"""
+        SELECT rank, entry, entry_name, player_name, event_total, total, last_rank,
+               summary_overall_rank, years_active, favourite_team_name
+        FROM players {where}
+        ORDER BY {order_column} DESC
+        LIMIT ?
+        """,
+        params,
+    )
+
+
+def rank_movers(db_path, direction, scope="Overall", limit=MOVERS_SIZE):
+    """
+    Return the precomputed rank climbers or fallers for a scope.
+    """
+    if direction not in ("climbers", "fallers"):
+        raise ValueError(f"Unsupported direction: {direction}")
+    return query(
+        db_path,
+        """
+        SELECT position, entry, entry_name, player_name, rank, last_rank, rank_change, total
+        FROM rank_movers
+        WHERE direction = ? AND scope = ?
+        ORDER BY position
+        LIMIT ?
+        """,
+        (direction, scope, limit),
+    )
+
+
+def all_rank_movers(db_path=DB_FILE):
+    """
+    Return the whole rank-movers index table.
+    """
+    return query(db_path, "SELECT * FROM rank_movers ORDER BY direction, scope, position")
+
+
+def search_names(db_path, text, limit=20):
+    """
+    Return managers whose team or manager name matches the search text.
+
+    Prefix matches rank first, then trigram similarity (Jaccard overlap
+    with the closer of the two names), then league rank. Candidates are
+    capped at SEARCH_CANDIDATES before scoring, keeping the best-ranked
+    prefix matches and, among equal trigram overlaps, the best-ranked
+    managers.
+    """
+    folded = fold_name(text)
+    columns = ["entry", "entry_name", "player_name", "rank", "total", "score"]
+    if not folded:
+        return pd.DataFrame(columns=columns)
+
+    conn = get_connection(db_path)
+    prefix_entries = {row[0] for row in conn.execute(
+        "SELECT entry FROM name_search WHERE folded >= ? AND folded < ? GROUP BY entry ORDER BY MIN(rank) NULLS LAST LIMIT ?",
+        (folded, folded + "\U0010ffff", SEARCH_CANDIDATES),
+    )}
+
+    # Short queries have too few trigrams to rank on, so they only match prefixes
+    query_grams = name_grams(folded)
+    gram_entries = set()
+    if len(folded) >= 3:
+        min_shared = max(1, len(query_grams) // 3)
+        gram_entries = {row[0] for row in conn.execute(
+            f"""
+            SELECT t.entry FROM name_trigrams t JOIN players p ON p.entry = t.entry
+            WHERE t.gram IN ({", ".join("?" * len(query_grams))})
+            GROUP BY t.entry
+            HAVING COUNT(*) >= ?
+            ORDER BY COUNT(*) DESC, MIN(p.rank) NULLS LAST
+            LIMIT ?
+            """,
+            (*query_grams, min_shared, SEARCH_CANDIDATES),
+        )}
+
+    candidates = prefix_entries | gram_entries
+    if not candidates:
+        return pd.DataFrame(columns=columns)
+    matches = query(
+        db_path,
+        f"SELECT entry, entry_name, player_name, rank, total FROM players WHERE entry IN ({', '.join('?' * len(candidates))})",
+        tuple(candidates),
+    )
+
+    def similarity(name):
+        grams = name_grams(fold_name(name))
+        return len(query_grams & grams) / len(query_grams | grams)
+
+    matches["score"] = [
+        max(similarity(entry_name), similarity(player_name)) + (entry in prefix_entries)
+        for entry, entry_name, player_name in matches[["entry", "entry_name", "player_name"]].itertuples(index=False)
+    ]
+    matches = matches.sort_values(["score", "rank"], ascending=[False, True])
+    return matches.head(limit).reset_index(drop=True)[columns]
+
+
+def entries(db_path, team=None, limit=None):
+    """
+    Return FPL IDs ordered by league rank, optionally for one favourite team.
+    """
+    where = "WHERE favourite_team_name = ?" if team else ""
+    params = (team,) if team else ()
+    limit_sql = "LIMIT ?" if limit else ""
+    params += (limit,) if limit else ()
+    rows = get_connection(db_path).execute(
+        f"SELECT entry FROM players {where} ORDER BY total DESC {limit_sql}", params
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def lookup_entry(db_path, entry_id):
+    """
+    Return the stored row for an FPL ID (entry).
+    """
+    return query(
+        db_path,
+        """
+        SELECT entry_name, rank, total, event_total, years_active, favourite_team_name,
+               last_rank, summary_overall_rank
+        FROM players
+        WHERE entry = ?
+        """,
+        (entry_id,),
+    )
+
+
+# Main execution
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    build_store(DATA_FILE, DB_FILE)
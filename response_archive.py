@@ -0,0 +1,160 @@
+import threading
+import logging
+import json
+import time
+import zlib
+import os
+
+# Constants
+ARCHIVE_DIR = "response_archive"
+INDEX_FILE = "index.tsv"
+SEGMENT_SIZE = 64 * 1024 * 1024  # Start a new segment file after 64 MB
+
+_default_archive = None
+_default_lock = threading.Lock()
+
+
+class ResponseArchive:
+    """
+    Append-only archive of compressed raw API responses.
+
+    Responses are zlib-compressed JSON records appended to segment files.
+    An append-only index maps (endpoint, key) to the segment file, offset
+    and length of the latest record, so any response can be read back with a
+    single seek and whole endpoints can be replayed sequentially.
+
+    Several processes write to the same archive, so each writer appends to
+    segment files of its own (named by start time and PID) and every index
+    line names its segment; index lines go out in one O_APPEND write each.
+    """
+
+    def __init__(self, archive_dir=ARCHIVE_DIR, segment_size=SEGMENT_SIZE):
+        self.archive_dir = archive_dir
+        self.segment_size = segment_size
+        self.lock = threading.Lock()
+        self.index = {}
+        os.makedirs(archive_dir, exist_ok=True)
+        self._load_index()
+
+        self.writer = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self.segment_count = 0
+        self.segment = None  # Opened on the first append, so read-only users create no files
+        self.segment_file = None
+        self.index_fd = os.open(os.path.join(archive_dir, INDEX_FILE), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _segment_path(self, segment):
+        return os.path.join(self.archive_dir, segment)
+
+    def _open_segment(self):
+        # Exclusive create: a segment file only ever has one writer
+        while True:
+            self.segment_count += 1
+            segment = f"segment-{self.writer}-{self.segment_count:05d}.bin"
+            try:
+                self.segment_file = open(self._segment_path(segment), "xb")
+            except FileExistsError:
+                continue
+            self.segment = segment
+            return
+
+    def _load_index(self):
+        path = os.path.join(self.archive_dir, INDEX_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) != 6:
+                    continue  # Skip a line cut short by a crash
+                endpoint, key, segment, offset, length, _ = parts
+                if segment.isdigit():
+                    segment = f"segment-{int(segment):05d}.bin"  # Written before segments were per writer
+                self.index[(endpoint, key)] = (segment, int(offset), int(length))
+        logging.info(f"Loaded {len(self.index)} archived responses from {path}")
+
+    def append(self, endpoint, key, data):
+        """
+        Compress and append a raw response, then record it in the index.
+        """
+        record = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        key = str(key)
+        with self.lock:
+            if self.segment_file is None or self.segment_file.tell() >= self.segment_size:
+                if self.segment_file is not None:
+                    self.segment_file.close()
+                self._open_segment()
+
+            offset = self.segment_file.tell()
+            self.segment_file.write(record)
+            self.segment_file.flush()
+            # The index line is written after the record, so it never points at missing bytes
+            line = f"{endpoint}\t{key}\t{self.segment}\t{offset}\t{len(record)}\t{int(time.time())}\n"
+            os.write(self.index_fd, line.encode("utf-8"))
+            self.index[(endpoint, key)] = (self.segment, offset, len(record))
+
+    def get(self, endpoint, key):
+        """
+        Return the latest archived response for an endpoint and key, or None.
+        """
+        location = self.index.get((endpoint, str(key)))
+        if location is None:
+            return None
+        segment, offset, length = location
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            return json.loads(zlib.decompress(f.read(length)))
+
+    def keys(self, endpoint):
+        """
+        Return the archived keys for an endpoint.
+        """
+        return [key for (ep, key) in self.index if ep == endpoint]
+
+    def replay(self, endpoint):
+        """
+        Yield (key, response) for the latest record of every key, in disk order.
+        """
+        locations = sorted(
+            (location, key) for (ep, key), location in self.index.items() if ep == endpoint
+        )
+        segment_file = None
+        current = None
+        try:
+            for (segment, offset, length), key in locations:
+                if segment != current:
+                    if segment_file:
+                        segment_file.close()
+                    segment_file = open(self._segment_path(segment), "rb")
+                    current = segment
+                segment_file.seek(offset)
+                yield key, json.loads(zlib.decompress(segment_file.read(length)))
+        finally:
+            if segment_file:
+                segment_file.close()
+
+    def close(self):
+        with self.lock:
+            if self.segment_file is not None:
+                self.segment_file.close()
+            os.close(self.index_fd)
+
+
+def default_archive():
+    """
+    Return the process-wide archive, opening it on first use.
+    """
+    global _default_archive
+    with _default_lock:
+        if _default_archive is None:
+            _default_archive = ResponseArchive()
+        return _default_archive
+
+
+def record(endpoint, key, data):
+    """
+    Archive a raw response in the process-wide archive.
+    """
+    try:
+        default_archive().append(endpoint, key, data)
+    except OSError as e:
+        logging.error(f"Error archiving {endpoint} response {key}: {e}")
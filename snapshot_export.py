@@ -0,0 +1,101 @@
+import plotly.io as pio
+import functools
+import logging
+import shutil
+import json
+import time
+import os
+import data_version
+
+# Constants
+STATIC_SUFFIX = "-static"  # Export directory sits next to the version's store
+INDEX_FILE = "index.json"
+PAGE_FILE = "index.html"
+PAGE_LEADERBOARD_SIZE = 100
+
+
+def static_dir(db_file):
+    """
+    Return the export directory for a data version's store.
+    """
+    return os.path.splitext(db_file)[0] + STATIC_SUFFIX
+
+
+def export_version(manifest=None):
+    """
+    Render every static Overview chart and leaderboard of a data version once.
+
+    Each figure is saved as Plotly JSON for the dashboard to load instead of
+    rebuilding it, and everything is also written as a standalone HTML page
+    that any static file server can host. The export is built in a temporary
+    directory and moved into place, so readers never see a partial export.
+    """
+    import charts  # Deferred: plotly.express is slow to import and readers of an export never need it
+
+    manifest = manifest or data_version.current_manifest()
+    snapshot = data_version.load_snapshot(manifest)
+    path = static_dir(manifest["db_file"])
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    figures = [(name, build(snapshot)) for name, build in charts.OVERVIEW_CHARTS]
+    figures.append(("top_countries", charts.top_countries(charts.load_country_data())))
+    for name, fig in figures:
+        with open(os.path.join(tmp_path, f"{name}.json"), "w", encoding="utf-8") as f:
+            f.write(fig.to_json())
+
+    gameweek = f"GW {snapshot['gameweek']}" if snapshot.get("gameweek") else "Latest GW"
+    tables = [
+        ("Leaderboard by Total Points", snapshot["top_total"]),
+        (f"Leaderboard by {gameweek} Points", snapshot["top_event"]),
+    ]
+    with open(os.path.join(tmp_path, PAGE_FILE), "w", encoding="utf-8") as f:
+        f.write(f"<html><head><meta charset=\"utf-8\"><title>FPL Kenya - {gameweek}</title></head><body>\n")
+        f.write(f"<h1>FPL Kenya</h1><p>Data version {snapshot['version']}, {gameweek}</p>\n")
+        for i, (name, fig) in enumerate(figures):
+            f.write(fig.to_html(full_html=False, include_plotlyjs="cdn" if i == 0 else False))
+        for title, table in tables:
+            f.write(f"<h2>{title}</h2>\n")
+            f.write(table.head(PAGE_LEADERBOARD_SIZE).to_html(index=False))
+        f.write("</body></html>\n")
+
+    data_version.write_json_atomic(os.path.join(tmp_path, INDEX_FILE), {
+        "version": snapshot["version"],
+        "figures": [name for name, _ in figures],
+        "exported_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    logging.info(f"Exported {len(figures)} figures for data version {snapshot['version']} to {path}")
+    return path
+
+
+def load_figures(path):
+    """
+    Load an export's figures as {name: plotly Figure}, or {} if it has none.
+    """
+    try:
+        with open(os.path.join(path, INDEX_FILE), "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return {}
+    figures = {}
+    for name in index["figures"]:
+        with open(os.path.join(path, f"{name}.json"), "r", encoding="utf-8") as f:
+            figures[name] = pio.from_json(f.read())
+    return figures
+
+
+@functools.lru_cache(maxsize=4)
+def cached_figures(path):
+    """
+    Load an export's figures once per process (exports never change once in place).
+    """
+    return load_figures(path)
+
+
+# Main execution
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    export_version()
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+import argparse
+import logging
+import os
+
+# Constants
+CHUNK_SIZE = 500_000  # Rows generated and written per chunk
+DEFAULT_GAMEWEEK = 20
+GLOBAL_MANAGERS = 11_000_000  # Size of the overall game, for summary_overall_rank
+
+# Column order of league_players.csv after update.py has enriched it
+COLUMNS = [
+    "player_id", "event_total", "player_name", "rank", "last_rank", "total", "entry", "entry_name",
+    "has_played", "joined_time", "started_event", "favourite_team", "years_active", "summary_overall_rank",
+]
+
+FIRST_NAMES = [
+    "Brian", "Kevin", "Dennis", "Collins", "Brenda", "Faith", "Mercy", "Joseph", "Peter", "Daniel",
+    "Grace", "Ann", "Samuel", "David", "John", "Mary", "James", "Esther", "Victor", "Ian",
+    "Wanjiru", "Otieno", "Achieng", "Kiprop", "Njeri", "Mutua", "Wafula", "Chebet", "Kamau", "Akinyi",
+]
+LAST_NAMES = [
+    "Odhiambo", "Kamau", "Mwangi", "Otieno", "Wanjiku", "Kiptoo", "Mutiso", "Njoroge", "Ochieng", "Cheruiyot",
+    "Omondi", "Kariuki", "Wambui", "Kibet", "Maina", "Onyango", "Nyambura", "Rotich", "Macharia", "Auma",
+]
+TEAM_WORDS = [
+    "FC", "United", "Rovers", "XI", "Stars", "Warriors", "Lions", "Gunners", "Reds", "Blues",
+    "Magic", "Dynamos", "Athletic", "Wanderers", "Legends", "Boys", "Kings", "Sharks", "Eagles", "Tuskers",
+]
+
+# Relative popularity of favourite teams (FPL ids 1-20), with a share of managers picking none
+TEAM_WEIGHTS = np.array([14, 2, 1, 1, 1, 12, 1, 1, 1, 1, 1, 13, 11, 14, 2, 1, 1, 3, 2, 1], dtype=float)
+NO_TEAM_SHARE = 0.08
+
+
+def league_totals(n, gameweek, rng):
+    """
+    Draw season totals for n managers: a mass of casual players below the engaged core.
+    """
+    engaged = rng.random(n) < 0.6
+    per_gameweek = np.where(engaged, rng.normal(52, 5, n), rng.normal(38, 10, n))
+    played = np.where(engaged, gameweek, rng.integers(1, gameweek + 1, n))
+    return np.clip(np.round(per_gameweek * played), 0, None).astype(np.int64)
+
+
+def tied_ranks(sorted_totals):
+    """
+    Return standings ranks for totals sorted best first, with ties sharing a rank.
+    """
+    positions = np.arange(1, len(sorted_totals) + 1)
+    new_value = np.r_[True, sorted_totals[1:] != sorted_totals[:-1]]
+    return np.maximum.accumulate(np.where(new_value, positions, 0))
+
+
+def name_choice(rng, words, n):
+    return np.asarray(words, dtype=object)[rng.integers(0, len(words), n)]
+
+
+def generate_chunk(start, totals, ranks, n_managers, gameweek, rng):
+    """
+    Build the rows for league positions start .. start + len(totals).
+    """
+    n = len(totals)
+    event_total = np.clip(np.round(rng.normal(50, 16, n) * (totals > 0)), 0, None).astype(np.int64)
+    last_rank = np.maximum(ranks + np.round(rng.normal(0, 0.08, n) * ranks).astype(np.int64), 1)
+
+    first, last = name_choice(rng, FIRST_NAMES, n), name_choice(rng, LAST_NAMES, n)
+    player_name = first + " " + last
+    entry_name = np.where(rng.random(n) < 0.5, last, first) + " " + name_choice(rng, TEAM_WORDS, n)
+
+    # Most managers join in the weeks before the season starts
+    joined = pd.Timestamp("2024-07-18", tz="UTC") + pd.to_timedelta(np.abs(rng.normal(0, 20, n)) * 86400, unit="s")
+    started_event = np.clip(((joined - pd.Timestamp("2024-08-16", tz="UTC")).days // 7) + 1, 1, gameweek).to_numpy()
+
+    favourite_team = (rng.choice(len(TEAM_WEIGHTS), n, p=TEAM_WEIGHTS / TEAM_WEIGHTS.sum()) + 1).astype(object)
+    favourite_team[rng.random(n) < NO_TEAM_SHARE] = None
+
+    # Better league totals go with better overall ranks, with plenty of noise
+    percentile = (start + np.arange(n) + 1) / n_managers
+    overall_rank = np.clip(percentile * GLOBAL_MANAGERS * rng.lognormal(0, 0.3, n), 1, GLOBAL_MANAGERS).astype(np.int64)
+
+    return pd.DataFrame({
+        "player_id": start + np.arange(n) + 1_000_000,
+        "event_total": event_total,
+        "player_name": player_name,
+        "rank": ranks,
+        "last_rank": last_rank,
+        "total": totals,
+        "entry": 0,  # Filled in by the caller from a shuffled ID space
+        "entry_name": entry_name,
+        "has_played": totals > 0,
+        "joined_time": joined.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "started_event": started_event,
+        "favourite_team": favourite_team,
+        "years_active": np.minimum(rng.geometric(0.25, n), 15),
+        "summary_overall_rank": overall_rank,
+    })[COLUMNS]
+
+
+def generate_league(n_managers, path, gameweek=DEFAULT_GAMEWEEK, seed=0, chunk_size=CHUNK_SIZE):
+    """
+    Write a synthetic league_players.csv-shaped file with n_managers rows.
+
+    Only the totals and FPL IDs are drawn for the whole league at once (they
+    decide the standings); every other column is generated chunk by chunk,
+    so memory stays flat however large the league is.
+    """
+    rng = np.random.default_rng(seed)
+    totals = np.sort(league_totals(n_managers, gameweek, rng))[::-1]
+    ranks = tied_ranks(totals)
+    entries = rng.permutation(np.cumsum(rng.integers(1, 40, n_managers)))  # Unique, sparse FPL IDs
+
+    tmp_path = f"{path}.tmp"
+    for start in range(0, n_managers, chunk_size):
+        end = min(start + chunk_size, n_managers)
+        chunk = generate_chunk(start, totals[start:end], ranks[start:end], n_managers, gameweek, rng)
+        chunk["entry"] = entries[start:end]
+        chunk.to_csv(tmp_path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+        logging.info(f"Generated {end}/{n_managers} managers")
+    os.replace(tmp_path, path)
+    return path
+
+
+# Main execution
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Generate a synthetic league_players.csv.")
+    parser.add_argument("--managers", type=int, default=1_000_000, help="Number of managers to generate")
+    parser.add_argument("--gameweek", type=int, default=DEFAULT_GAMEWEEK, help="Gameweek the totals run up to")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", default="league_players.csv", help="CSV file to write")
+    args = parser.parse_args()
+    generate_league(args.managers, args.output, args.gameweek, args.seed)
@@ -3,42 +3,89 @@ import requests
 import logging
 import time
 import os
+import json
+import argparse
+import threading
+import subprocess
+import sys
+import response_archive
+import profiling
+import fetch_logging
+import query_engine
+import data_version
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("update_players.log"),
-        logging.StreamHandler()
-    ]
-)
+fetch_logging.configure("update_players.log")
 
 # Constants
 CHECKPOINT_FILE = "processed_ids.txt"
 THREADS = 10  # Number of threads for parallel API calls
+UPDATE_COLUMNS = ["joined_time", "started_event", "favourite_team", "years_active", "summary_overall_rank"]
+DEAD_LETTER_FILE = "dead_letters.json"
+RETRY_MAX_RETRIES = 5  # Retry pass: more attempts with a slower backoff
+RETRY_BACKOFF = 5
+PUBLISH_EVERY = 50_000  # Enriched rows between partial publishes once the visible managers are done
+CLEANING_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_cleaning.py")
+
+# Failed manager IDs, shared by the fetch threads
+dead_letters = {}
+dead_letters_lock = threading.Lock()
+
+# Record a manager ID that exhausted its retries
+def record_dead_letter(manager_id, error, attempts):
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    with dead_letters_lock:
+        entry = dead_letters.setdefault(int(manager_id), {"attempts": 0})
+        entry["error"] = type(error).__name__
+        entry["status"] = status
+        entry["message"] = str(error)
+        entry["attempts"] += attempts
+        entry["last_attempt"] = time.strftime("%Y-%m-%d %H:%M:%S")
 
 # Function to fetch manager data with retries
-def fetch_manager_data(manager_id, max_retries=3):
+def fetch_manager_data(manager_id, max_retries=3, backoff=1):
     url = f"https://fantasy.premierleague.com/api/entry/{manager_id}/"
     retries = 0
-    backoff = 1
 
     while retries < max_retries:
         try:
             response = requests.get(url)
             response.raise_for_status()
-            return response.json()
+            data = response.json()
+            response_archive.record("entry", manager_id, data)  # Keep the full response for offline replay
+            with dead_letters_lock:
+                dead_letters.pop(int(manager_id), None)
+            return data
         except requests.RequestException as e:
             retries += 1
-            logging.warning(f"Retry {retries}/{max_retries} for manager_id {manager_id}: {e}")
+            logging.warning(f"Retry {retries}/{max_retries} for manager_id {manager_id}: {e}", extra={"rate_key": "entry retry"})
+            if retries == max_retries:
+                record_dead_letter(manager_id, e, retries)
+                break
             time.sleep(backoff)
             backoff *= 2  # Exponential backoff
 
-    logging.error(f"Failed to fetch data for manager_id {manager_id} after {max_retries} retries.")
+    logging.error(f"Failed to fetch data for manager_id {manager_id} after {max_retries} retries.", extra={"rate_key": "entry failed"})
     return None
 
+# Save failed manager IDs with their error class and attempt count
+def save_dead_letters():
+    with dead_letters_lock:
+        data = {str(manager_id): entry for manager_id, entry in dead_letters.items()}
+    with open(f"{DEAD_LETTER_FILE}.tmp", "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(f"{DEAD_LETTER_FILE}.tmp", DEAD_LETTER_FILE)
+
+# Load failed manager IDs
+def load_dead_letters():
+    if os.path.exists(DEAD_LETTER_FILE):
+        with open(DEAD_LETTER_FILE, "r") as f:
+            data = json.load(f)
+        with dead_letters_lock:
+            dead_letters.clear()
+            dead_letters.update({int(manager_id): entry for manager_id, entry in data.items()})
+
 # Save checkpoint of processed IDs
 def save_checkpoint(processed_ids):
     with open(CHECKPOINT_FILE, "w") as f:
@@ -51,77 +98,257 @@ def load_checkpoint():
             return set(map(int, f.read().splitlines()))
     return set()
 
+# Extract the fields we keep from an entry response
+def extract_manager_fields(data):
+    return {
+        "joined_time": data.get("joined_time"),
+        "started_event": data.get("started_event"),
+        "favourite_team": data.get("favourite_team"),
+        "years_active": data.get("years_active"),
+        "summary_overall_rank": data.get("summary_overall_rank"),
+    }
+
 # Update the DataFrame with fetched data
-def update_player_data(row, processed_ids):
+def update_player_data(row, processed_ids, progress, **fetch_options):
     manager_id = row["entry"]
     if manager_id in processed_ids:
+        progress.add("skipped")
         return None  # Skip already processed IDs
 
-    data = fetch_manager_data(manager_id)
+    data = fetch_manager_data(manager_id, **fetch_options)
     if data:
-        return {
-            "index": row.name,
-            "joined_time": data.get("joined_time"),
-            "started_event": data.get("started_event"),
-            "favourite_team": data.get("favourite_team"),
-            "years_active": data.get("years_active"),
-            "summary_overall_rank": data.get("summary_overall_rank"),
-        }
+        progress.add("updated")
+        return {"index": row.name, **extract_manager_fields(data)}
+    progress.add("failed")
     return None
 
 # Parallel data fetching
-def process_data_in_parallel(df, processed_ids):
+def process_data_in_parallel(df, processed_ids, progress, **fetch_options):
     updates = []
     with ThreadPoolExecutor(max_workers=THREADS) as executor:
-        futures = {executor.submit(update_player_data, row, processed_ids): row for _, row in df.iterrows()}
+        futures = {executor.submit(update_player_data, row, processed_ids, progress, **fetch_options): row for _, row in df.iterrows()}
         for future in as_completed(futures):
             result = future.result()
             if result:
                 updates.append(result)
     return updates
 
+# Apply fetched updates to the DataFrame and mark their IDs processed
+def apply_updates(df, updates, processed_ids):
+    for update in updates:
+        for col in UPDATE_COLUMNS:
+            df.at[update["index"], col] = update[col]
+
+        # Add to processed IDs
+        processed_ids.add(df.at[update["index"], "entry"])
+
+# Favourite teams from the last published version, used before this run has fetched them
+def previous_favourite_teams():
+    manifest = data_version.read_manifest()
+    if manifest is None or not os.path.exists(manifest["db_file"]):
+        return pd.Series(dtype=float)
+    teams = query_engine.query(manifest["db_file"], "SELECT entry, favourite_team FROM players WHERE favourite_team IS NOT NULL")
+    return teams.drop_duplicates("entry").set_index("entry")["favourite_team"]
+
+def top_of_table(frame, n, by_gameweek=True):
+    """
+    Return the index of the top n by total (and gameweek points), and the top n rank climbers and fallers.
+    """
+    moved = frame[(frame["rank"] > 0) & (frame["last_rank"] > 0)]
+    change = moved["last_rank"] - moved["rank"]
+    visible = frame.nlargest(n, "total").index.union(change.nlargest(n).index).union(change.nsmallest(n).index)
+    if by_gameweek:
+        visible = visible.union(frame.nlargest(n, "event_total").index)
+    return visible
+
+def priority_order(df, previous_teams=None):
+    """
+    Return df's index ordered by how visible each manager is on the dashboard.
+
+    The managers the leaderboards and movers show come first: the top of
+    the table by total and gameweek points, the biggest climbers and
+    fallers, and per favourite team the top by total and the movers. Teams
+    are taken from the CSV where already fetched and from the last
+    published version otherwise. Everyone else follows in standings order.
+    """
+    n = max(data_version.LEADERBOARD_SIZE, query_engine.MOVERS_SIZE)
+    visible = top_of_table(df, n)
+
+    teams = pd.to_numeric(df["favourite_team"], errors="coerce")
+    if previous_teams is not None and len(previous_teams):
+        teams = teams.fillna(df["entry"].map(previous_teams))
+    for _, team_rows in df[teams.notna()].groupby(teams[teams.notna()]):
+        visible = visible.union(top_of_table(team_rows, n, by_gameweek=False))
+
+    order = df.assign(_hidden=~df.index.isin(visible)).sort_values(["_hidden", "rank"], kind="stable")
+    return order.index, len(visible)
+
+def start_publish(file_path, season=None, gameweek=None):
+    """
+    Start data_cleaning.py on the CSV as saved so far, without waiting for it.
+
+    Rows not enriched yet are cleaned like any missing values, so a version
+    published mid-run is complete for the managers processed first.
+    """
+    command = [sys.executable, CLEANING_SCRIPT, "--input", file_path]
+    if season and gameweek:
+        command += ["--season", season, "--gameweek", str(gameweek)]
+    logging.info("Publishing a data version in the background.")
+    return subprocess.Popen(command, stdout=subprocess.DEVNULL)
+
+# Log a finished publish that exited non-zero, and return whether it failed
+def publish_failed(publisher):
+    if publisher.returncode:
+        logging.error(f"Publishing a data version failed: {os.path.basename(CLEANING_SCRIPT)} exited with status {publisher.returncode}.")
+        return True
+    return False
+
+# Save the CSV through a temporary file, so a publish running alongside never reads half a file
+def save_csv(df, file_path):
+    df.to_csv(f"{file_path}.tmp", index=False)
+    os.replace(f"{file_path}.tmp", file_path)
+
 # Main function to update CSV
-def update_csv(file_path):
+def update_csv(file_path, publish=False, season=None, gameweek=None):
     # Load the CSV
-    df = pd.read_csv(file_path)
+    with profiling.section("update.load_csv"):
+        df = pd.read_csv(file_path)
     
     # Add columns if not already present
-    for col in ["joined_time","started_event", "favourite_team", "years_active", "summary_overall_rank"]:
+    for col in UPDATE_COLUMNS:
         if col not in df.columns:
             df[col] = None
 
     # Load processed IDs
     processed_ids = load_checkpoint()
     logging.info(f"Loaded {len(processed_ids)} processed IDs from checkpoint.")
+    load_dead_letters()
 
-    # Process data in batches
+    # Managers the dashboard shows first, then the rest by rank; already processed rows are dropped up front
+    with profiling.section("update.priority_order"):
+        order, visible = priority_order(df, previous_favourite_teams())
+        unprocessed = ~df.loc[order, "entry"].isin(processed_ids).to_numpy()
+        pending = order[unprocessed]
+        visible_pending = int(unprocessed[:visible].sum())
+    logging.info(f"{len(pending)} managers to enrich; {visible_pending} of {visible} leaderboard-visible managers first.")
+
+    # Process data in batches; progress is logged as periodic summaries instead of per batch
     batch_size = 1000
-    for start in range(0, len(df), batch_size):
-        batch_df = df.iloc[start:start + batch_size]
-        logging.info(f"Processing batch {start // batch_size + 1}: rows {start} to {start + len(batch_df) - 1}")
+    progress = fetch_logging.Progress("Manager entries", total=len(pending))
+    publisher = None
+    next_publish = visible_pending
+    for start in range(0, len(pending), batch_size):
+        batch_df = df.loc[pending[start:start + batch_size]]
+        logging.debug(f"Processing batch {start // batch_size + 1}: {len(batch_df)} rows")
 
         # Fetch data in parallel
-        updates = process_data_in_parallel(batch_df, processed_ids)
+        with profiling.section("update.fetch_batch"):
+            updates = process_data_in_parallel(batch_df, processed_ids, progress)
 
         # Apply updates to the DataFrame
-        for update in updates:
-            df.at[update["index"], "joined_time"] = update["joined_time"]
-            df.at[update["index"], "started_event"] = update["started_event"]
-            df.at[update["index"], "favourite_team"] = update["favourite_team"]
-            df.at[update["index"], "years_active"] = update["years_active"]
-            df.at[update["index"], "summary_overall_rank"] = update["summary_overall_rank"]
-
-            # Add to processed IDs
-            processed_ids.add(df.at[update["index"], "entry"])
+        with profiling.section("update.apply_updates"):
+            apply_updates(df, updates, processed_ids)
 
         # Save progress
-        df.to_csv(file_path, index=False)
-        save_checkpoint(processed_ids)
-        logging.info(f"Batch {start // batch_size + 1} processed and saved.")
+        with profiling.section("update.save_progress"):
+            save_csv(df, file_path)
+            save_checkpoint(processed_ids)
+            save_dead_letters()
+        logging.debug(f"Batch {start // batch_size + 1} processed and saved.")
 
-    logging.info("All updates completed.")
+        # Publish once the visible managers are done, then every PUBLISH_EVERY rows; a publish still running is not doubled up
+        done = start + len(batch_df)
+        if publish and done >= next_publish and done < len(pending) and (publisher is None or publisher.poll() is not None):
+            if publisher is not None:
+                publish_failed(publisher)
+            publisher = start_publish(file_path, season, gameweek)
+            next_publish = done + PUBLISH_EVERY
+
+    progress.close()
+    logging.info(f"All updates completed. {len(dead_letters)} manager IDs in {DEAD_LETTER_FILE}.")
+    if publish:
+        if publisher is not None:
+            publisher.wait()
+            publish_failed(publisher)
+        publisher = start_publish(file_path, season, gameweek)
+        publisher.wait()
+        if publish_failed(publisher):
+            raise RuntimeError("The final data version was not published.")
+
+# Retry only the manager IDs recorded in the dead-letter store
+@profiling.profiled("update.retry_dead_letters")
+def retry_dead_letters(file_path):
+    load_dead_letters()
+    if not dead_letters:
+        logging.info("No dead letters to retry.")
+        return
+
+    df = pd.read_csv(file_path)
+    for col in UPDATE_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+
+    processed_ids = load_checkpoint()
+    retry_df = df[df["entry"].isin(list(dead_letters))]
+    logging.info(f"Retrying {len(retry_df)} of {len(dead_letters)} dead-letter manager IDs.")
+
+    # Process only the failed rows, with the retry pass's own backoff schedule
+    with fetch_logging.Progress("Dead-letter retries", total=len(retry_df)) as progress:
+        updates = process_data_in_parallel(retry_df, processed_ids, progress, max_retries=RETRY_MAX_RETRIES, backoff=RETRY_BACKOFF)
+    apply_updates(df, updates, processed_ids)
+
+    # IDs no longer in the CSV cannot be applied, so drop them from the store
+    with dead_letters_lock:
+        for manager_id in set(dead_letters) - set(retry_df["entry"]):
+            del dead_letters[manager_id]
+
+    save_csv(df, file_path)
+    save_checkpoint(processed_ids)
+    save_dead_letters()
+    logging.info(f"Recovered {len(updates)} manager IDs. {len(dead_letters)} still in {DEAD_LETTER_FILE}.")
+
+# Re-run extraction from archived responses, without the network
+@profiling.profiled("update.replay")
+def replay_csv(file_path):
+    df = pd.read_csv(file_path)
+    for col in UPDATE_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+
+    # Map FPL IDs to row positions once, instead of searching per response
+    positions = pd.Series(range(len(df)), index=df["entry"])
+    positions = positions[~positions.index.duplicated()]
+
+    rows, values = [], []
+    for manager_id, data in response_archive.default_archive().replay("entry"):
+        position = positions.get(int(manager_id))
+        if position is None:
+            continue
+        fields = extract_manager_fields(data)
+        rows.append(position)
+        values.append([fields[col] for col in UPDATE_COLUMNS])
+
+    logging.info(f"Replayed {len(rows)} archived responses for {file_path}")
+    if rows:
+        df[UPDATE_COLUMNS] = df[UPDATE_COLUMNS].astype(object)
+        df.iloc[rows, [df.columns.get_loc(col) for col in UPDATE_COLUMNS]] = values
+    save_csv(df, file_path)
+    logging.info("Replay completed.")
 
 # Main execution
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enrich league players with FPL entry data.")
+    parser.add_argument("--replay", action="store_true", help="Re-run extraction from the response archive instead of the API")
+    parser.add_argument("--retry-dead-letters", action="store_true", help=f"Retry only the manager IDs recorded in {DEAD_LETTER_FILE}")
+    parser.add_argument("--publish", action="store_true", help="Publish partial data versions as the most visible managers complete")
+    parser.add_argument("--season", help="Season passed to data_cleaning.py when publishing")
+    parser.add_argument("--gameweek", type=int, help="Gameweek passed to data_cleaning.py when publishing")
+    args = parser.parse_args()
+
     csv_file_path = "league_players.csv"  # Path to your CSV file
-    update_csv(csv_file_path)
+    if args.replay:
+        replay_csv(csv_file_path)
+    elif args.retry_dead_letters:
+        retry_dead_letters(csv_file_path)
+    else:
+        update_csv(csv_file_path, args.publish, args.season, args.gameweek)